@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Encoder benchmark and golden payload check.
+
+Renders representative frames for every model in DEVICE_TYPES and the badge,
+times each encode stage separately, records payload sizes and compares the
+payloads against golden hashes, so an optimization can't silently change the
+bytes sent on air. The four-color (BWRY) payloads are also compared with the
+original per-pixel packer for every mirror_x / mirror_y combination.
+Runs headless: Home Assistant and BLE hardware are not needed.
+
+Usage:
+  python3 benchmarks/bench_encoders.py                   # benchmark + golden check
+  python3 benchmarks/bench_encoders.py --repeat 20       # more timing samples
+  python3 benchmarks/bench_encoders.py --update-golden   # after an intended format change
+  python3 benchmarks/bench_encoders.py --json out.json   # machine readable results
+  python3 benchmarks/bench_encoders.py --conformance      # QuickLZ round-trip + fuzz harness
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import importlib
+import json
+from pathlib import Path
+import statistics
+import sys
+import time
+import types
+
+import numpy as np
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+COMPONENT = ROOT / "custom_components" / "gicisky"
+GOLDEN = Path(__file__).resolve().parent / "golden.json"
+EXAMPLES = ROOT / "examples"
+
+FRAMES = ("blank", "dashboard", "photo")
+# four_color models checked against the original per-pixel packer
+FOUR_COLOR_MODELS = (0x2E, 0x4E)
+THRESHOLD = 128
+RED_THRESHOLD = 128
+
+
+def _load(name: str) -> types.ModuleType:
+    """Import an encoder module without running the Home Assistant package __init__ files."""
+    for package, path in (
+        ("gicisky", COMPONENT),
+        ("gicisky.gicisky_ble", COMPONENT / "gicisky_ble"),
+        ("gicisky.badge_eink_ble", COMPONENT / "badge_eink_ble"),
+    ):
+        if package not in sys.modules:
+            module = types.ModuleType(package)
+            module.__path__ = [str(path)]
+            sys.modules[package] = module
+    return importlib.import_module(f"gicisky.{name}")
+
+
+def render_frame(kind: str, width: int, height: int) -> Image.Image:
+    """Deterministic test frame (numpy only, so it does not depend on font rendering)."""
+    frame = np.full((height, width, 3), 255, dtype=np.uint8)
+    if kind == "dashboard":
+        rng = np.random.default_rng(width * 1000 + height)
+        # red header bar, black "text" blocks and horizontal rules
+        frame[: max(1, height // 8)] = (220, 20, 20)
+        for _ in range(max(4, width * height // 2000)):
+            x = int(rng.integers(0, max(1, width - 12)))
+            y = int(rng.integers(height // 8, max(height // 8 + 1, height - 8)))
+            frame[y : y + int(rng.integers(2, 8)), x : x + int(rng.integers(2, 12))] = 0
+        frame[height // 2 :: max(2, height // 6), :] = 0
+        frame[-max(1, height // 10) :, : width // 3] = (240, 200, 0)
+    elif kind == "photo":
+        rng = np.random.default_rng(width + height)
+        y, x = np.mgrid[0:height, 0:width]
+        frame[..., 0] = (x * 255 // max(1, width - 1)).astype(np.uint8)
+        frame[..., 1] = (y * 255 // max(1, height - 1)).astype(np.uint8)
+        frame[..., 2] = rng.integers(0, 256, (height, width), dtype=np.uint8)
+    return Image.fromarray(frame, "RGB")
+
+
+def _timed(stats: dict[str, list[float]], stage: str, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    stats.setdefault(stage, []).append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def bench_gicisky(device, image: Image.Image, repeat: int) -> tuple[dict[str, list[float]], bytes]:
+    encoder_mod = _load("gicisky_ble.encoder")
+    compile_plan = _load("gicisky_ble.geometry").compile_plan
+    get_classifier = _load("gicisky_ble.classify").get_classifier
+
+    chunk_cache = _load("gicisky_ble.compression").chunk_cache
+
+    encoder = encoder_mod.ImageEncoder(device)
+    classifier = get_classifier(encoder.classifier_mode, THRESHOLD, RED_THRESHOLD)
+    stats: dict[str, list[float]] = {}
+    for _ in range(repeat):
+        # cold timings: the chunk LRU would otherwise serve every sample after the first
+        chunk_cache.clear()
+        rgb = _timed(stats, "render", compile_plan(device).apply, image)
+        classes = _timed(stats, "classify", classifier.classify, rgb)
+        if encoder.four_color:
+            _timed(stats, "pack", encoder._make_four_color_packet, classes)
+        else:
+            planes = _timed(stats, "pack", encoder._pack_planes, classes)
+            if encoder.compression2:
+                _timed(stats, "compress", encoder._compress_byte_data_2, planes)
+                chunk_cache.clear()
+            elif encoder.compression:
+                half = len(planes) // 2
+                _timed(stats, "compress", encoder._compress_byte_data, planes[:half], planes[half:])
+        payload = _timed(
+            stats, "total", encoder_mod.encode_frame, device, image, THRESHOLD, RED_THRESHOLD
+        )
+    return stats, payload
+
+
+def bench_badge(image: Image.Image, repeat: int) -> tuple[dict[str, list[float]], bytes]:
+    encoder = _load("badge_eink_ble.encoder")
+    rle = _load("badge_eink_ble.rle")
+    classify = _load("gicisky_ble.classify")
+
+    classifier = classify.get_classifier(classify.MODE_ETAG)
+    stats: dict[str, list[float]] = {}
+    for _ in range(repeat):
+        resized = _timed(stats, "render", image.resize, (800, 480), Image.LANCZOS)
+        classes = _timed(stats, "classify", classifier.classify, np.asarray(resized))
+        black = (classes & classify.CLASS_BLACK).reshape(-1)
+        red = ((classes & classify.CLASS_RED) >> 1).reshape(-1)
+        _timed(stats, "compress", lambda: (rle.encode(black), rle.encode(red)))
+        payload = _timed(stats, "total", encoder.encode_frame, image, 800, 480)
+    return stats, payload
+
+
+def run(repeat: int) -> list[dict]:
+    devices = _load("gicisky_ble.devices")
+    fingerprint = _load("gicisky_ble.cache").payload_fingerprint
+
+    results = []
+    for device_id, device in devices.DEVICE_TYPES.items():
+        for kind in FRAMES:
+            image = render_frame(kind, device.width, device.height)
+            stats, payload = bench_gicisky(device, image, repeat)
+            results.append(
+                {
+                    "key": f"0x{device_id:02X} {kind}",
+                    "model": device.model,
+                    "size": len(payload),
+                    "hash": fingerprint(payload),
+                    "ms": {stage: statistics.median(v) for stage, v in stats.items()},
+                }
+            )
+
+    for kind in FRAMES:
+        image = render_frame(kind, 800, 480)
+        stats, payload = bench_badge(image, repeat)
+        results.append(
+            {
+                "key": f"badge_eink {kind}",
+                "model": "Badge e-ink 800x480",
+                "size": len(payload),
+                "hash": fingerprint(payload),
+                "ms": {stage: statistics.median(v) for stage, v in stats.items()},
+            }
+        )
+    return results
+
+
+def reference_four_color(device, image: Image.Image, threshold: int, red_threshold: int) -> bytes:
+    """The original per-pixel BWRY encoder (overlay, rotate, mirrored scan, 2-bit shifts)."""
+    img = Image.new("RGB", (device.width, device.height), color="white")
+    ov = image.convert("RGB")
+    if ov.width > img.width or ov.height > img.height:
+        ov = ov.crop((0, 0, img.width, img.height))
+    img.paste(ov, (0, 0))
+    if device.tft:
+        img = img.resize((img.width // 2, img.height * 2), resample=Image.BICUBIC)
+    if device.rotation != 0:
+        img = img.rotate(device.rotation, expand=True)
+    width, height = img.size
+    pixels = img.load()
+
+    byte_data = []
+    current_byte = 0
+    shift_counter = 3
+    for y in range(height - 1, -1, -1) if device.mirror_y else range(height):
+        for x in range(width - 1, -1, -1) if device.mirror_x else range(width):
+            r, g, b = pixels[(x, y)]
+            luminance = ((r * 38) + (g * 75) + (b * 15)) >> 7
+            is_white = luminance > threshold
+            is_red = r > red_threshold
+            is_green = g > red_threshold
+            is_blue = b > red_threshold
+            if is_green and is_red and is_blue:
+                is_green = False
+            if is_red and is_white:
+                is_red = False
+            # 00: Black, 01: White, 10: Yellow, 11: Red
+            val = 2 if is_green else (3 if is_red else (1 if is_white else 0))
+            current_byte |= val << (shift_counter * 2)
+            if shift_counter == 0:
+                byte_data.append(current_byte)
+                current_byte = 0
+                shift_counter = 3
+            else:
+                shift_counter -= 1
+    return bytes(byte_data)
+
+
+def check_four_color() -> list[str]:
+    """Compare encode_frame() with reference_four_color() on the BWRY models; return mismatching frames."""
+    devices = _load("gicisky_ble.devices")
+    encode_frame = _load("gicisky_ble.encoder").encode_frame
+
+    mismatches = []
+    for device_id in FOUR_COLOR_MODELS:
+        base = devices.DEVICE_TYPES[device_id]
+        for mirror_x in (False, True):
+            for mirror_y in (False, True):
+                # geometry plans are cached per model: give every variant its own model id
+                device = dataclasses.replace(
+                    base,
+                    model=f"{base.model} mirror_x={mirror_x} mirror_y={mirror_y}",
+                    mirror_x=mirror_x,
+                    mirror_y=mirror_y,
+                )
+                for kind in FRAMES:
+                    image = render_frame(kind, device.width, device.height)
+                    expected = reference_four_color(device, image, THRESHOLD, RED_THRESHOLD)
+                    if encode_frame(device, image, THRESHOLD, RED_THRESHOLD) != expected:
+                        mismatches.append(f"0x{device_id:02X} {kind} mirror_x={mirror_x} mirror_y={mirror_y}")
+    return mismatches
+
+
+def _conformance_planes():
+    """Yield (name, packed BW + red planes) for rendered and example frames on every 1-bit model."""
+    devices = _load("gicisky_ble.devices")
+    encoder_mod = _load("gicisky_ble.encoder")
+    compile_plan = _load("gicisky_ble.geometry").compile_plan
+    get_classifier = _load("gicisky_ble.classify").get_classifier
+    examples = sorted(p for p in EXAMPLES.iterdir() if p.suffix in (".png", ".jpg"))
+    for device_id, device in devices.DEVICE_TYPES.items():
+        if device.four_color:
+            continue
+        encoder = encoder_mod.ImageEncoder(device)
+        frames = [(kind, render_frame(kind, device.width, device.height)) for kind in FRAMES]
+        frames += [
+            (path.name, Image.open(path).convert("RGB").resize((device.width, device.height), Image.LANCZOS))
+            for path in examples
+        ]
+        for name, image in frames:
+            rgb = compile_plan(device).apply(image)
+            classes = get_classifier(encoder.classifier_mode, THRESHOLD, RED_THRESHOLD).classify(rgb)
+            yield f"0x{device_id:02X} {name}", bytes(encoder._pack_planes(classes))
+
+
+def _fuzz_chunks(count: int):
+    """Random 64-byte chunks shaped like e-paper bit planes (runs, sparse bits, short patterns)."""
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        kind = i % 5
+        if kind == 0:
+            chunk = rng.integers(0, 256, 64, dtype=np.uint8)
+        elif kind == 1:
+            chunk = np.full(64, rng.choice((0x00, 0xFF)), dtype=np.uint8)
+            chunk[rng.integers(0, 64, rng.integers(1, 9))] = rng.integers(0, 256)
+        elif kind == 2:
+            chunk = np.resize(rng.integers(0, 256, rng.integers(1, 9), dtype=np.uint8), 64)
+        elif kind == 3:
+            chunk = rng.choice(np.array((0x00, 0xFF, 0x0F, 0xF0), dtype=np.uint8), 64)
+        else:
+            chunk = np.repeat(rng.integers(0, 256, 8, dtype=np.uint8), rng.integers(1, 16, 8))[:64]
+            chunk = np.resize(chunk, 64)
+        yield chunk.tobytes()
+
+
+def conformance(fuzz: int) -> int:
+    """Round-trip every QuickLZ chunk through the decoder and every payload through decompress()."""
+    compression = _load("gicisky_ble.compression")
+    chunk_size = compression._CHUNK_SIZE
+
+    def check_chunk(chunk: bytes) -> str:
+        core = compression._qlz_compress_core(chunk)
+        if core is None:
+            return "raw"
+        return "ok" if compression._qlz_decompress_core(core, len(chunk)) == chunk else "mismatch"
+
+    failures = 0
+    totals = {"ok": 0, "raw": 0, "mismatch": 0}
+    for name, raw in _conformance_planes():
+        counts = {"ok": 0, "raw": 0, "mismatch": 0}
+        for pos in range(0, len(raw), chunk_size):
+            counts[check_chunk(raw[pos : pos + chunk_size])] += 1
+        payload = compression.compress(raw)
+        round_trip = compression.decompress(payload) == raw
+        failures += not round_trip
+        for key, value in counts.items():
+            totals[key] += value
+        print(
+            f"{name:<40} {len(raw):>7} -> {len(payload):>7}  "
+            f"0x75={counts['ok']:<5} 0x74={counts['raw']:<5} mismatch={counts['mismatch']:<3} "
+            f"{'ok' if round_trip else 'ROUND TRIP FAILED'}"
+        )
+
+    fuzz_counts = {"ok": 0, "raw": 0, "mismatch": 0}
+    for chunk in _fuzz_chunks(fuzz):
+        fuzz_counts[check_chunk(chunk)] += 1
+    print(f"\nframes: {totals}")
+    print(f"fuzz ({fuzz} chunks): {fuzz_counts}")
+    # mismatching chunks are sent as 0x74 by the compressor, but they point at a codec bug
+    if totals["mismatch"] or fuzz_counts["mismatch"]:
+        print("QuickLZ core round-trip mismatches found (sent raw)", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def print_table(results: list[dict], golden: dict[str, str]) -> None:
+    stages = ("render", "classify", "pack", "compress", "total")
+    print(f"{'frame':<22} {'size':>8} " + " ".join(f"{s:>9}" for s in stages) + "  golden")
+    for result in results:
+        ms = result["ms"]
+        timings = " ".join(f"{ms[s]:9.2f}" if s in ms else f"{'-':>9}" for s in stages)
+        expected = golden.get(result["key"])
+        status = "new" if expected is None else "ok" if expected == result["hash"] else "CHANGED"
+        print(f"{result['key']:<22} {result['size']:>8} {timings}  {status}")
+    print("(median ms per stage)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timing samples per frame (default 5)")
+    parser.add_argument("--update-golden", action="store_true", help="rewrite golden.json with the current payloads")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument("--conformance", action="store_true", help="run the QuickLZ round-trip harness instead")
+    parser.add_argument("--fuzz", type=int, default=20000, help="random chunks for --conformance (default 20000)")
+    args = parser.parse_args()
+
+    if args.conformance:
+        return conformance(args.fuzz)
+
+    results = run(max(1, args.repeat))
+    golden = json.loads(GOLDEN.read_text()) if GOLDEN.exists() else {}
+    print_table(results, golden)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+    if args.update_golden:
+        GOLDEN.write_text(json.dumps({r["key"]: r["hash"] for r in results}, indent=2) + "\n")
+        print(f"Updated {GOLDEN}")
+        return 0
+
+    changed = [r["key"] for r in results if r["key"] in golden and golden[r["key"]] != r["hash"]]
+    if changed:
+        print(f"\nPayload changed for: {', '.join(changed)}", file=sys.stderr)
+        return 1
+
+    mismatches = check_four_color()
+    if mismatches:
+        print(f"\nFour-color payload differs from the per-pixel packer for: {', '.join(mismatches)}", file=sys.stderr)
+        return 1
+    print("Four-color payloads match the per-pixel packer")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
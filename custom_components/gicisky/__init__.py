@@ -4,26 +4,41 @@ from __future__ import annotations
 
 from functools import partial
 import logging
+from typing import Any
 import time
 import asyncio
 from asyncio import sleep, Lock
-from io import BytesIO
+
+import voluptuous as vol
 
 from .imagegen import *
 from .gicisky_ble import GiciskyBluetoothDeviceData, SensorUpdate
 from .badge_eink_ble import BadgeEinkBluetoothDeviceData
-from .gicisky_ble.writer import update_image as gicisky_update_image
+from .gicisky_ble.cache import frame_cache, frame_key, payload_fingerprint
+from .gicisky_ble.writer import TransferStats, WritePacer, update_image as gicisky_update_image
+from .badge_eink_ble.encoder import (
+    frame_cache_key as badge_eink_frame_cache_key,
+    payload_stats as badge_eink_payload_stats,
+)
 from .badge_eink_ble.writer import update_image as badge_eink_update_image
+from .gicisky_ble.encoder import payload_stats as gicisky_payload_stats
 from homeassistant.components.bluetooth import (
     DOMAIN as BLUETOOTH_DOMAIN,
     BluetoothScanningMode,
     BluetoothServiceInfoBleak,
     async_ble_device_from_address,
 )
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
 from homeassistant.helpers import device_registry as dr, entity_registry as er
 from homeassistant.helpers.device_registry import DeviceRegistry
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util.signal_type import SignalType
 from homeassistant.exceptions import HomeAssistantError
@@ -31,15 +46,28 @@ from homeassistant.exceptions import HomeAssistantError
 from .const import (
     DOMAIN,
     LOCK,
+    STORE,
+    STORE_FINGERPRINT,
+    STORE_PART_RTT,
+    STORE_FRAME_KEY,
+    STORE_WRITE_DELAY,
+    STORE_RESUME,
+    ENCODE_POOL,
     DEVICE_TYPE_GICISKY,
     DEVICE_TYPE_BADGE_EINK,
     CONF_DEVICE_TYPE,
     CONF_RETRY_COUNT,
     CONF_WRITE_DELAY_MS,
+    CONF_ENCODE_WORKERS,
+    CONF_TRANSFER_WINDOW,
     DEFAULT_RETRY_COUNT,
     DEFAULT_WRITE_DELAY_MS,
+    DEFAULT_ENCODE_WORKERS,
+    DEFAULT_TRANSFER_WINDOW,
 )
 from .coordinator import GiciskyPassiveBluetoothProcessorCoordinator
+from .encode_pool import EncodePool
+from .store import GiciskyStore
 from .types import GiciskyConfigEntry
 
 PLATFORMS: list[Platform] = [
@@ -52,6 +80,20 @@ PLATFORMS: list[Platform] = [
 
 _LOGGER = logging.getLogger(__name__)
 
+# Integration-wide settings (configuration.yaml); devices are set up from config entries
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Optional(CONF_ENCODE_WORKERS, default=DEFAULT_ENCODE_WORKERS): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=8)
+                ),
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
 def process_service_info(
     hass: HomeAssistant,
     entry: GiciskyConfigEntry,
@@ -68,6 +110,15 @@ def process_service_info(
 
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Start the encode pool shared by every device."""
+    workers = config.get(DOMAIN, {}).get(CONF_ENCODE_WORKERS, DEFAULT_ENCODE_WORKERS)
+    pool = EncodePool(hass, workers)
+    hass.data.setdefault(DOMAIN, {})[ENCODE_POOL] = pool
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, lambda _: pool.shutdown())
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: GiciskyConfigEntry) -> bool:
     """Set up Gicisky Bluetooth from a config entry."""
     if DOMAIN not in hass.data:
@@ -93,6 +144,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: GiciskyConfigEntry) -> b
     if LOCK not in hass.data[DOMAIN]:
         hass.data[DOMAIN][LOCK] = Lock()
 
+    if STORE not in hass.data[DOMAIN]:
+        store = GiciskyStore(hass)
+        hass.data[DOMAIN][STORE] = store
+        await store.async_load()
+
     device_registry = dr.async_get(hass)
     bt_coordinator = GiciskyPassiveBluetoothProcessorCoordinator(
         hass,
@@ -125,15 +181,22 @@ async def async_setup_entry(hass: HomeAssistant, entry: GiciskyConfigEntry) -> b
         _LOGGER,
         name=DOMAIN,
     )
+    stats_coordinator: DataUpdateCoordinator[dict[str, Any] | None] = DataUpdateCoordinator(
+        hass,
+        _LOGGER,
+        name=DOMAIN,
+    )
     entry.runtime_data = bt_coordinator
     hass.data[DOMAIN][entry.entry_id]['image_coordinator'] = image_coordinator
     hass.data[DOMAIN][entry.entry_id]['preview_coordinator'] = preview_coordinator
     hass.data[DOMAIN][entry.entry_id]['connectivity_coordinator'] = connectivity_coordinator
     hass.data[DOMAIN][entry.entry_id]['duration_coordinator'] = duration_coordinator
+    hass.data[DOMAIN][entry.entry_id]['stats_coordinator'] = stats_coordinator
     hass.data[DOMAIN][entry.entry_id]['duration_task'] = None
     hass.data[DOMAIN][entry.entry_id]['start_time'] = None
     connectivity_coordinator.async_set_updated_data(False)
     duration_coordinator.async_set_updated_data(0.0)
+    stats_coordinator.async_set_updated_data(None)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     async def update_duration_loop(entry_id: str):
@@ -145,40 +208,149 @@ async def async_setup_entry(hass: HomeAssistant, entry: GiciskyConfigEntry) -> b
                 hass.data[DOMAIN][entry_id]['duration_coordinator'].async_set_updated_data(elapsed)
             await asyncio.sleep(1)
 
+    async def prepare_frame(
+        service: ServiceCall, device_id: str, entry_id: str, dry_run: bool
+    ) -> tuple[bytes, bytes | None, str]:
+        """Render a device's frame and encode it, returning (png, payload, frame key).
+
+        The payload is None for dry runs and for frames the tag already shows (same frame key).
+        """
+        pool = hass.data[DOMAIN][ENCODE_POOL]
+        store = hass.data[DOMAIN][STORE]
+        address = hass.data[DOMAIN][entry_id]['address']
+        data = hass.data[DOMAIN][entry_id]['data']
+        device_type = hass.data[DOMAIN][entry_id].get('device_type', DEVICE_TYPE_GICISKY)
+        threshold = int(service.data.get("threshold", 128))
+        red_threshold = int(service.data.get("red_threshold", 128))
+        force = service.data.get("force", False)
+        # Gicisky frames are encoded from the canvas as drawn: the geometry plan applies the
+        # service's rotate together with the device rotation and mirroring in one transpose
+        rotate = 0 if device_type == DEVICE_TYPE_BADGE_EINK else canvas_rotation(service)
+        image = await hass.async_add_executor_job(
+            partial(
+                customimage, entry_id, data.device, service, hass,
+                apply_rotate=(device_type == DEVICE_TYPE_BADGE_EINK),
+            )
+        )
+        image_png = await hass.async_add_executor_job(canvas_png, image, rotate)
+
+        # The frame key is computed once: it drives the unchanged-frame skip and is the frame cache key
+        if device_type == DEVICE_TYPE_BADGE_EINK:
+            image = await hass.async_add_executor_job(image.convert, "RGB")
+            key = await hass.async_add_executor_job(
+                badge_eink_frame_cache_key, image, 800, 480
+            )
+        else:
+            key = await hass.async_add_executor_job(
+                frame_key, image, data.device.model, threshold, red_threshold, rotate
+            )
+        # Unchanged-frame skip, first stage: the frame key of the last written frame is
+        # persisted, so repeating the same drawing (same model, thresholds and rotation)
+        # skips the encode as well as the transfer. The payload fingerprint in writeservice()
+        # still catches different drawings that encode to the same payload.
+        if not dry_run and not force and store.get(address, STORE_FRAME_KEY) == key.hex():
+            _LOGGER.info(f"{address} already shows this frame, skipping encode and write")
+            return image_png, None, key.hex()
+
+        encode_start = time.monotonic()
+        if device_type == DEVICE_TYPE_BADGE_EINK:
+            payload = await pool.async_encode_badge_eink(image, key, 800, 480)
+        else:
+            payload = await pool.async_encode_gicisky(
+                data.device, image, key, threshold, red_threshold, rotate, store.get(address, STORE_PART_RTT)
+            )
+        await publish_frame(entry_id, payload, round(time.monotonic() - encode_start, 3))
+        # If dry_run is True, skip the transfer to the actual device
+        if dry_run:
+            return image_png, None, key.hex()
+        return image_png, payload, key.hex()
+
+    async def publish_frame(entry_id: str, payload: bytes, encode_time: float | None) -> None:
+        """Record payload statistics and show the decoded payload on the preview camera.
+
+        Decoding the payload back verifies it and shows exactly what the panel will display.
+        """
+        pool = hass.data[DOMAIN][ENCODE_POOL]
+        address = hass.data[DOMAIN][entry_id]['address']
+        data = hass.data[DOMAIN][entry_id]['data']
+        device_type = hass.data[DOMAIN][entry_id].get('device_type', DEVICE_TYPE_GICISKY)
+        if device_type == DEVICE_TYPE_BADGE_EINK:
+            stats = badge_eink_payload_stats(payload, 800, 480)
+        else:
+            stats = gicisky_payload_stats(data.device, payload)
+        stats["encode_time"] = encode_time
+        stats["frame_cache_hit_rate"] = frame_cache.stats()["hit_rate"]
+        hass.data[DOMAIN][entry_id]['stats_coordinator'].async_set_updated_data(stats)
+
+        try:
+            if device_type == DEVICE_TYPE_BADGE_EINK:
+                preview = await pool.async_preview_badge_eink(payload)
+            else:
+                preview = await pool.async_preview_gicisky(data.device, payload)
+        except ValueError as err:
+            raise HomeAssistantError(f"{address} encoded payload failed verification: {err}") from err
+        hass.data[DOMAIN][entry_id]['preview_coordinator'].async_set_updated_data(preview)
+
     @callback
     # callback for the draw custom service
-    async def writeservice(service: ServiceCall) -> None:
+    async def writeservice(service: ServiceCall) -> ServiceResponse:
         lock = hass.data[DOMAIN][LOCK]
+        store = hass.data[DOMAIN][STORE]
+        results: dict[str, str] = {}
         async with lock:
             device_ids = service.data.get("device_id")
             if isinstance(device_ids, str):
                 device_ids = [device_ids]
 
             dry_run = service.data.get("dry_run", False)
+            force = service.data.get("force", False)
+
+            entry_ids = [await get_entry_id_from_device(hass, device_id) for device_id in device_ids]
+
+            # Render and encode every frame up front (in parallel when the encode pool is enabled),
+            # then transfer them one device at a time. A frame that fails to render, encode or
+            # verify only fails its own device.
+            frames = await asyncio.gather(
+                *(
+                    prepare_frame(service, device_id, entry_id, dry_run)
+                    for device_id, entry_id in zip(device_ids, entry_ids)
+                ),
+                return_exceptions=True,
+            )
 
             # Process each device
-            for device_id in device_ids:
-                entry_id = await get_entry_id_from_device(hass, device_id)
+            for device_id, entry_id, frame in zip(device_ids, entry_ids, frames):
+                if isinstance(frame, BaseException):
+                    if not isinstance(frame, Exception):
+                        raise frame
+                    _LOGGER.error(f"Failed to prepare the frame for {device_id}: {frame}")
+                    results[device_id] = f"failed: {frame}"
+                    continue
+                image_png, payload, key = frame
+                if payload is None:
+                    # Not encoded: dry run, or the tag already shows this frame (same frame key)
+                    results[device_id] = "dry_run" if dry_run else "unchanged"
+                    continue
+
                 config_entry = hass.config_entries.async_get_entry(entry_id)
                 options = {**config_entry.data, **config_entry.options}
                 max_retries = int(options.get(CONF_RETRY_COUNT, DEFAULT_RETRY_COUNT))
                 write_delay_ms = int(options.get(CONF_WRITE_DELAY_MS, DEFAULT_WRITE_DELAY_MS))
+                window = int(options.get(CONF_TRANSFER_WINDOW, DEFAULT_TRANSFER_WINDOW))
                 address = hass.data[DOMAIN][entry_id]['address']
                 data = hass.data[DOMAIN][entry_id]['data']
                 device_type = hass.data[DOMAIN][entry_id].get('device_type', DEVICE_TYPE_GICISKY)
                 image_coordinator = hass.data[DOMAIN][entry_id]['image_coordinator']
-                preview_coordinator = hass.data[DOMAIN][entry_id]['preview_coordinator']
                 connectivity_coordinator = hass.data[DOMAIN][entry_id]['connectivity_coordinator']
                 duration_coordinator = hass.data[DOMAIN][entry_id]['duration_coordinator']
                 ble_device = async_ble_device_from_address(hass, address)
-                threshold = int(service.data.get("threshold", 128))
-                red_threshold = int(service.data.get("red_threshold", 128))
-                image = await hass.async_add_executor_job(customimage, entry_id, data.device, service, hass)
-                image_bytes = BytesIO()
-                image.save(image_bytes, "PNG")
-                preview_coordinator.async_set_updated_data(image_bytes.getvalue())
-                # If dry_run is True, skip sending to the actual device
-                if dry_run:
+
+                # Unchanged-frame skip, second stage: the tag already shows this exact payload
+                fingerprint = payload_fingerprint(payload)
+                if not force and store.get(address, STORE_FINGERPRINT) == fingerprint:
+                    _LOGGER.info(f"{address} already shows this image, skipping write")
+                    store.set(address, STORE_FRAME_KEY, key)
+                    results[device_id] = "unchanged"
                     continue
 
                 # Start duration tracking
@@ -190,29 +362,58 @@ async def async_setup_entry(hass: HomeAssistant, entry: GiciskyConfigEntry) -> b
                 duration_task = asyncio.create_task(update_duration_loop(entry_id))
                 hass.data[DOMAIN][entry_id]['duration_task'] = duration_task
                 
+                # Learned write delay: new connections start from the last value
+                pacer = WritePacer(store.get(address, STORE_WRITE_DELAY), floor=write_delay_ms / 1000.0)
+
                 try:
                     for attempt in range(1, max_retries + 1):
                         # Call appropriate update function based on device type
                         if device_type == DEVICE_TYPE_BADGE_EINK:
                             success = await badge_eink_update_image(
                                 ble_device,
-                                image_bytes.getvalue(),
-                                width=800,
-                                height=480,
+                                payload,
                             )
                         else:
+                            # Parts the tag acknowledged in an earlier failed transfer of this payload
+                            resume = store.get(address, STORE_RESUME)
+                            if resume and resume["fingerprint"] == fingerprint:
+                                resume = resume["part"]
+                            else:
+                                resume = 0
+                            transfer_stats = TransferStats()
                             success = await gicisky_update_image(
                                 ble_device, 
                                 data.device, 
-                                image, 
-                                threshold, 
-                                red_threshold, 
+                                payload, 
                                 attempt=attempt, 
-                                write_delay_ms=write_delay_ms
+                                write_delay_ms=write_delay_ms,
+                                window=window,
+                                stats=transfer_stats,
+                                pacer=pacer,
+                                resume=resume,
                             )
+                            store.set(address, STORE_WRITE_DELAY, round(pacer.delay, 4))
+                            if success:
+                                store.set(address, STORE_RESUME, None)
+                            elif transfer_stats.acked_parts:
+                                store.set(address, STORE_RESUME, {
+                                    "fingerprint": fingerprint,
+                                    "part": transfer_stats.acked_parts,
+                                })
+                            if transfer_stats.part_rtt is not None:
+                                # Smoothed per-part round-trip time, used for transfer time estimates
+                                part_rtt = store.get(address, STORE_PART_RTT)
+                                if part_rtt is not None:
+                                    part_rtt = 0.7 * part_rtt + 0.3 * transfer_stats.part_rtt
+                                else:
+                                    part_rtt = transfer_stats.part_rtt
+                                store.set(address, STORE_PART_RTT, round(part_rtt, 4))
                         
                         if success:
-                            image_coordinator.async_set_updated_data(image_bytes.getvalue())
+                            image_coordinator.async_set_updated_data(image_png)
+                            store.set(address, STORE_FINGERPRINT, fingerprint)
+                            store.set(address, STORE_FRAME_KEY, key)
+                            results[device_id] = "written"
                             break
 
                         _LOGGER.warning(f"Write failed to {address} (attempt {attempt}/{max_retries})")
@@ -238,8 +439,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: GiciskyConfigEntry) -> b
                     hass.data[DOMAIN][entry_id]['duration_task'] = None
                     connectivity_coordinator.async_set_updated_data(False)
 
+        return {"results": results}
+
     # register the services
-    hass.services.async_register(DOMAIN, "write", writeservice)
+    hass.services.async_register(
+        DOMAIN, "write", writeservice, supports_response=SupportsResponse.OPTIONAL
+    )
 
     # only start after all platforms have had a chance to subscribe
     entry.async_on_unload(bt_coordinator.async_start())
@@ -0,0 +1,143 @@
+"""Badge e-ink frame encoder (ETAG payloads, usable without a BLE connection)."""
+
+from __future__ import annotations
+
+from io import BytesIO
+import struct
+
+import numpy as np
+from PIL import Image
+
+from ..gicisky_ble.cache import frame_cache, frame_key
+from ..gicisky_ble.classify import CLASS_BLACK, CLASS_RED, MODE_ETAG, get_classifier
+from . import etag as _etag
+from . import rle as _rle
+
+# ETAG plane header: 0xFC, plane flags, height - 1 (0x8000 set on red), width - 1, RLE size
+_PLANE_HEADER = struct.Struct(">BIHHI")
+# payload_to_image() palette: index 0 black, 1 white, 2 red
+PREVIEW_PALETTE = (
+    (0, 0, 0),
+    (255, 255, 255),
+    (255, 0, 0),
+)
+
+
+def encode_image(image_bytes: bytes, width: int = 800, height: int = 480) -> bytes:
+    """Convert PNG/JPEG image data to the ETAG payload sent to the device.
+
+    Args:
+        image_bytes: PNG/JPEG image data as bytes
+        width: Target image width
+        height: Target image height
+
+    Returns:
+        ETAG payload bytes
+    """
+    return _prepare_etag_bytes_from_png(image_bytes, target_w=width, target_h=height)
+
+
+def frame_cache_key(image: Image.Image, width: int = 800, height: int = 480) -> bytes:
+    """Return the frame cache key of a decoded RGB frame."""
+    return frame_key(image, f"badge_eink {width}x{height}", 0, 0)
+
+
+def encode_frame(image: Image.Image, width: int = 800, height: int = 480) -> bytes:
+    """Encode a decoded RGB frame without the frame cache (picklable, for process pool workers)."""
+    # Resize using high-quality filter
+    im = image.resize((width, height), Image.LANCZOS)
+    arr = np.array(im)
+
+    # Classify pixels: bit0 = black (low luminance), bit1 = red (red dominant)
+    classes = get_classifier(MODE_ETAG).classify(arr)
+    black_mask = classes & CLASS_BLACK
+    red_mask = (classes & CLASS_RED) >> 1
+
+    # Flatten and encode using RLE
+    flat_black = black_mask.reshape(-1)
+    flat_red = red_mask.reshape(-1)
+
+    black_rle = _rle.encode(flat_black)
+    red_rle = _rle.encode(flat_red)
+
+    # Build headers and concatenate
+    hdr_black = _etag.build_black_plane_header(width, height, len(black_rle))
+    hdr_red = _etag.build_red_plane_header(width, height, len(red_rle))
+
+    return hdr_black + bytes(black_rle) + hdr_red + bytes(red_rle)
+
+
+def payload_stats(payload: bytes, width: int = 800, height: int = 480) -> dict[str, int]:
+    """Size statistics of an ETAG payload.
+
+    Args:
+        payload: ETAG payload bytes
+        width: Image width
+        height: Image height
+
+    Returns:
+        Raw plane size (black + red), encoded size and number of 200-byte packets
+    """
+    return {
+        "raw_size": 2 * (-(-width * height // 8)),
+        "encoded_size": len(payload),
+        "parts": -(-len(payload) // 200),
+    }
+
+
+def payload_to_image(payload: bytes) -> Image.Image:
+    """Decode an ETAG payload from encode_frame() back into the palette image the badge shows.
+
+    Args:
+        payload: ETAG payload bytes (black plane + red plane)
+
+    Returns:
+        "P" mode image using PREVIEW_PALETTE (red wins over black)
+
+    Raises:
+        ValueError: if the payload is truncated or its plane headers are invalid
+    """
+    planes = []
+    pos = 0
+    for _ in range(2):
+        if pos + _PLANE_HEADER.size > len(payload):
+            raise ValueError("Truncated ETAG payload")
+        magic, _flags, height, width, size = _PLANE_HEADER.unpack_from(payload, pos)
+        pos += _PLANE_HEADER.size
+        if magic != 0xFC or pos + size > len(payload):
+            raise ValueError("Invalid ETAG plane header")
+        planes.append(_rle.decode(payload[pos : pos + size], (width & 0x7FFF) + 1, (height & 0x7FFF) + 1))
+        pos += size
+
+    black, red = planes
+    if black.shape != red.shape:
+        raise ValueError("ETAG planes differ in size")
+    indices = np.where(red != 0, 2, np.where(black != 0, 0, 1)).astype(np.uint8)
+    frame = Image.fromarray(indices)
+    frame.putpalette([level for color in PREVIEW_PALETTE for level in color])
+    return frame
+
+
+def _prepare_etag_bytes_from_png(
+    png_bytes: bytes, target_w: int = 800, target_h: int = 480
+) -> bytes:
+    """Convert PNG/JPEG image bytes to device ETAG payload.
+
+    Args:
+        png_bytes: Image data as bytes
+        target_w: Target width for resizing
+        target_h: Target height for resizing
+
+    Returns:
+        Raw bytes ready for BLE transmission
+    """
+    # Open image from bytes
+    im = Image.open(BytesIO(png_bytes)).convert("RGB")
+    key = frame_cache_key(im, target_w, target_h)
+    cached = frame_cache.get(key)
+    if cached is not None:
+        return cached
+
+    image_data = encode_frame(im, target_w, target_h)
+    frame_cache.put(key, image_data)
+    return image_data
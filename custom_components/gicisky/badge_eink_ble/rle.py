@@ -3,32 +3,36 @@
 import numpy as np
 
 
-def decode(data):
+# Non-RLE byte (0x80 | 7 pixel bits) -> its 7 pixel values, MSB first
+_LITERAL_PIXELS = [tuple((bits >> (6 - i)) & 1 for i in range(7)) for bits in range(128)]
+_LITERAL_LENGTHS = (1,) * 7
+
+
+def decode(data, width=800, height=480):
     """Decode RLE-encoded data for badge e-ink format.
     
     Args:
         data: RLE encoded byte data
+        width: Plane width
+        height: Plane height
         
     Returns:
-        Decoded 2D array (480x800 format expected)
+        Decoded 2D array (height x width)
     """
+    # Collect (value, run length) pairs first and expand them with one np.repeat
+    values = []
+    lengths = []
     in_ptr = 0
-    out_ptr = 0
-    out_data = np.zeros((480 * 800), dtype=np.uint8)
     
     while in_ptr < len(data):
         sb = data[in_ptr]
         if sb & 0x80 == 0x80:
             # Non-RLE data - 7 pixels directly encoded
+            values.extend(_LITERAL_PIXELS[sb & 0x7F])
+            lengths.extend(_LITERAL_LENGTHS)
             in_ptr = in_ptr + 1
-            for i in range(0, 7):
-                out_data[out_ptr + i] = (sb & (1 << (6 - i))) != 0
-            out_ptr = out_ptr + 7
         else:
             # RLE encoded data
-            rle_length = 0
-            px_value = (sb & 0x40) != 0
-            
             if sb & 0x40 == sb:
                 # 3-byte RLE: length is next 2 bytes
                 rle_length = data[in_ptr + 1] + (data[in_ptr + 2] << 8)
@@ -41,11 +45,14 @@ def decode(data):
                 # 1-byte RLE: length is in lower 5 bits
                 rle_length = sb & 0x1F
                 in_ptr = in_ptr + 1
-            
-            out_data[out_ptr : out_ptr + rle_length] = px_value
-            out_ptr = out_ptr + rle_length
+            values.append((sb >> 6) & 1)
+            lengths.append(rle_length)
     
-    return out_data.reshape(480, 800)
+    out_data = np.zeros((width * height), dtype=np.uint8)
+    # The last non-RLE byte may carry padding pixels past the end of the plane
+    pixels = np.repeat(np.array(values, dtype=np.uint8), lengths)[: out_data.size]
+    out_data[: pixels.size] = pixels
+    return out_data.reshape(height, width)
 
 
 def encode(data):
@@ -38,8 +38,10 @@ from .const import (
     CONF_DEVICE_TYPE,
     CONF_RETRY_COUNT,
     CONF_WRITE_DELAY_MS,
+    CONF_TRANSFER_WINDOW,
     DEFAULT_RETRY_COUNT,
     DEFAULT_WRITE_DELAY_MS,
+    DEFAULT_TRANSFER_WINDOW,
 )
 from .badge_eink_ble.const import (
     BADGE_EINK_WRITE_CHAR,
@@ -68,6 +70,14 @@ OPTIONS_SCHEMA = {
             unit_of_measurement="ms",
         )
     ),
+    vol.Required(CONF_TRANSFER_WINDOW, default=DEFAULT_TRANSFER_WINDOW): NumberSelector(
+        NumberSelectorConfig(
+            min=1,
+            max=8,
+            step=1,
+            mode=NumberSelectorMode.BOX,
+        )
+    ),
 }
 
 
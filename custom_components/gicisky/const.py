@@ -4,6 +4,17 @@ from __future__ import annotations
 
 DOMAIN = "gicisky"
 LOCK = "lock"
+STORE = "store"
+ENCODE_POOL = "encode_pool"
+
+# Storage
+STORAGE_KEY = DOMAIN
+STORAGE_VERSION = 1
+STORE_FINGERPRINT = "fingerprint"
+STORE_FRAME_KEY = "frame_key"
+STORE_PART_RTT = "part_rtt"
+STORE_WRITE_DELAY = "write_delay"
+STORE_RESUME = "resume"
 
 # Device types
 DEVICE_TYPE_GICISKY = "gicisky"
@@ -13,11 +24,15 @@ DEVICE_TYPE_BADGE_EINK = "badge_eink"
 CONF_RETRY_COUNT = "retry_count"
 CONF_WRITE_DELAY_MS = "write_delay_ms"
 CONF_DEVICE_TYPE = "device_type"
+CONF_ENCODE_WORKERS = "encode_workers"
+CONF_TRANSFER_WINDOW = "transfer_window"
 
 # Defaults
 DEFAULT_RETRY_COUNT = 3
 DEFAULT_WRITE_DELAY_MS = 0
 DEFAULT_DEVICE_TYPE = DEVICE_TYPE_GICISKY
+DEFAULT_ENCODE_WORKERS = 0
+DEFAULT_TRANSFER_WINDOW = 1
 
 # Badge e-ink characteristics
 BADGE_EINK_CHAR_WRITE = "00001525-1212-efde-1523-785feabcd123"
@@ -0,0 +1,26 @@
+"""Diagnostics support for Gicisky."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DEVICE_TYPE_GICISKY
+from .gicisky_ble.cache import frame_cache
+from .gicisky_ble.compression import chunk_cache
+from .types import GiciskyConfigEntry
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: GiciskyConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "address": entry_data["address"],
+        "device_type": entry_data.get("device_type", DEVICE_TYPE_GICISKY),
+        "options": {**entry.data, **entry.options},
+        "frame_cache": frame_cache.stats(),
+        "chunk_cache": chunk_cache.stats(),
+    }
@@ -0,0 +1,132 @@
+"""Frame encode stage for the write service."""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+import logging
+import multiprocessing
+from pathlib import Path
+import runpy
+
+from PIL import Image
+
+from homeassistant.core import HomeAssistant
+
+from .badge_eink_ble.encoder import (
+    encode_frame as badge_eink_encode_frame,
+    payload_to_image as badge_eink_payload_to_image,
+)
+from .gicisky_ble.cache import frame_cache
+from .gicisky_ble.devices import DeviceEntry
+from .gicisky_ble.encoder import (
+    encode_frame as gicisky_encode_frame,
+    payload_to_image as gicisky_payload_to_image,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_WORKER_BOOTSTRAP = Path(__file__).with_name("encode_worker.py")
+
+
+def _render_preview(payload_to_image, *args) -> bytes:
+    """Decode a payload into the PNG the panel will show (raises ValueError if it does not decode)."""
+    png = BytesIO()
+    payload_to_image(*args).save(png, "PNG")
+    return png.getvalue()
+
+
+class EncodePool:
+    """Encode rendered frames in-process or on a pool of worker processes.
+
+    The frame cache lives in the Home Assistant process: lookups and inserts
+    happen here, workers only run the uncached encoders.
+    """
+
+    def __init__(self, hass: HomeAssistant, workers: int = 0) -> None:
+        """Start the worker processes (0 encodes in-process)."""
+        self.hass = hass
+        self.workers = max(0, int(workers))
+        self._executor: ProcessPoolExecutor | None = None
+        if self.workers:
+            # spawn: forking the running Home Assistant process is not safe.
+            # encode_worker.py keeps the workers from importing the integration's __init__ modules.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=runpy.run_path,
+                initargs=(str(_WORKER_BOOTSTRAP), {"PACKAGE": __package__}),
+            )
+            _LOGGER.debug("Encode pool started with %s workers", self.workers)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            _LOGGER.debug("Encode pool stopped")
+        self.workers = 0
+
+    async def async_encode_gicisky(
+        self,
+        device: DeviceEntry,
+        image: Image.Image,
+        key: bytes,
+        threshold: int,
+        red_threshold: int,
+        rotate: int = 0,
+        part_rtt: float | None = None,
+    ) -> bytes:
+        """Encode a canvas that still needs rotating by rotate degrees clockwise (see compile_plan()).
+
+        key: the frame's frame_key(), already computed by the caller.
+        """
+        payload = frame_cache.get(key)
+        if payload is None:
+            if self._executor is None:
+                payload = await self.hass.async_add_executor_job(
+                    gicisky_encode_frame, device, image, threshold, red_threshold, rotate, None, part_rtt
+                )
+            elif device.compression2 and self.workers > 1:
+                # 10.2" frames: fan the QuickLZ chunk batches out over the workers
+                payload = await self.hass.async_add_executor_job(
+                    gicisky_encode_frame, device, image, threshold, red_threshold, rotate, self._executor, part_rtt
+                )
+            else:
+                payload = await self.hass.loop.run_in_executor(
+                    self._executor, gicisky_encode_frame, device, image, threshold, red_threshold, rotate, None, part_rtt
+                )
+            frame_cache.put(key, payload)
+        return payload
+
+    async def async_encode_badge_eink(
+        self,
+        image: Image.Image,
+        key: bytes,
+        width: int = 800,
+        height: int = 480,
+    ) -> bytes:
+        """Encode a decoded RGB frame; key: its frame_cache_key(), already computed by the caller."""
+        payload = frame_cache.get(key)
+        if payload is None:
+            if self._executor is None:
+                payload = await self.hass.async_add_executor_job(
+                    badge_eink_encode_frame, image, width, height
+                )
+            else:
+                payload = await self.hass.loop.run_in_executor(
+                    self._executor, badge_eink_encode_frame, image, width, height
+                )
+            frame_cache.put(key, payload)
+        return payload
+
+    async def async_preview_gicisky(self, device: DeviceEntry, payload: bytes) -> bytes:
+        """PNG of what a Gicisky tag will display for this payload."""
+        return await self.hass.async_add_executor_job(
+            _render_preview, gicisky_payload_to_image, device, payload
+        )
+
+    async def async_preview_badge_eink(self, payload: bytes) -> bytes:
+        """PNG of what the badge will display for this payload."""
+        return await self.hass.async_add_executor_job(
+            _render_preview, badge_eink_payload_to_image, payload
+        )
@@ -0,0 +1,34 @@
+"""Encode pool worker bootstrap.
+
+EncodePool runs this file with runpy.run_path() in every spawned worker, before
+any task is unpickled. The encoders live inside this integration, whose package
+__init__ modules pull in Home Assistant, bleak and the advertisement parsers;
+registering the packages as bare namespaces lets a worker import only the
+encoder modules (and their numpy / Pillow dependencies).
+"""
+
+import sys
+import types
+from pathlib import Path
+
+
+def register_packages(package: str) -> None:
+    """Register package and its BLE subpackages without running their __init__."""
+    root = Path(__file__).resolve().parent
+    parts = package.split(".")
+    paths = {
+        ".".join(parts[: level + 1]): root.parents[len(parts) - level - 2]
+        for level in range(len(parts) - 1)
+    }
+    paths[package] = root
+    for sub in ("gicisky_ble", "badge_eink_ble"):
+        paths[f"{package}.{sub}"] = root / sub
+    for name, path in paths.items():
+        if name not in sys.modules:
+            module = types.ModuleType(name)
+            module.__path__ = [str(path)]
+            sys.modules[name] = module
+
+
+if __name__ == "<run_path>":
+    register_packages(PACKAGE)  # noqa: F821 - passed in init_globals
@@ -0,0 +1,102 @@
+"""
+Content-addressed cache for encoded device frames.
+
+렌더링된 프레임(RGB) + threshold + red_threshold + 모델 id 해시를 키로
+최종 인코딩 payload를 저장하는 LRU 캐시 (전체 크기를 바이트 단위로 제한).
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+import hashlib
+import sys
+import threading
+
+from PIL import Image
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+# OrderedDict slot and link node of one entry (measured on CPython 3.12, rounded up)
+_ENTRY_OVERHEAD = 100
+
+
+def frame_key(
+    image: Image.Image,
+    model: str,
+    threshold: int,
+    red_threshold: int,
+    rotate: int = 0,
+) -> bytes:
+    """Return the cache key of a rendered frame for the given model and thresholds."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{model}|{threshold}|{red_threshold}|{rotate}|{image.mode}|{image.size}".encode())
+    h.update(image.tobytes())
+    return h.digest()
+
+
+def payload_fingerprint(payload: bytes) -> str:
+    """Return the fingerprint of an encoded payload (used to detect unchanged frames)."""
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _entry_size(key: bytes, payload: bytes) -> int:
+    """Memory held by one entry: key and payload objects plus the container's bookkeeping."""
+    return sys.getsizeof(key) + sys.getsizeof(payload) + _ENTRY_OVERHEAD
+
+
+class FrameCache:
+    """LRU cache of encoded payloads, bounded by the memory its entries take.
+
+    size counts keys and per-entry overhead as well as payloads: for small
+    values such as chunk records they outweigh the payload bytes.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> bytes | None:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: bytes, payload: bytes) -> None:
+        payload = bytes(payload)
+        entry_size = _entry_size(key, payload)
+        if entry_size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= _entry_size(key, old)
+            self._entries[key] = payload
+            self.size += entry_size
+            while self.size > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.size -= _entry_size(evicted_key, evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+frame_cache = FrameCache()
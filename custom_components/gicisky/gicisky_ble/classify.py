@@ -0,0 +1,99 @@
+"""
+Shared RGB -> color class front end for all encoders.
+
+채널별 256-entry 테이블이 각 채널을 (휘도 가중치 + threshold 비교 비트)로 양자화하고,
+세 값의 합을 인덱스로 class 테이블을 한 번 조회한다.
+- 휘도 (r*38 + g*75 + b*15) 합은 하위 15비트 (최대 32640)
+- threshold 비교 비트는 그 위 비트에 겹치지 않게 배치
+정확한 24비트 LUT (16 MiB)와 결과가 동일하면서 threshold 조합당 512 KiB만 사용한다.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+
+# BW / BWR: bit0 = white, bit1 = red
+MODE_BWR = "bwr"
+# BW / BWR with inverted luminance (e.g. 7.5" 0x2B)
+MODE_BWR_INVERT = "bwr_invert"
+# BWRY: 0 = black, 1 = white, 2 = yellow, 3 = red
+MODE_BWRY = "bwry"
+# Badge ETAG: bit0 = black, bit1 = red
+MODE_ETAG = "etag"
+
+CLASS_WHITE = 0x01
+CLASS_RED = 0x02
+CLASS_BLACK = 0x01
+
+_LUM_BITS = 15
+_R_GT = 1 << 0
+_G_GT = 1 << 1
+_G_LT = 1 << 2
+_B_GT = 1 << 3
+
+
+class ColorClassifier:
+    """Classify whole (height, width, 3) uint8 frames with table lookups."""
+
+    def __init__(self, mode: str, threshold: int, red_threshold: int) -> None:
+        self.mode = mode
+        self.threshold = threshold
+        self.red_threshold = red_threshold
+        levels = np.arange(256, dtype=np.uint32)
+
+        if mode == MODE_ETAG:
+            # float 휘도는 정수 테이블로 옮기면 경계값이 달라지므로 채널별 가중치만 테이블화
+            self._lum_r = 0.2126 * levels
+            self._lum_g = 0.7152 * levels
+            self._lum_b = 0.0722 * levels
+            return
+
+        if mode not in (MODE_BWR, MODE_BWR_INVERT, MODE_BWRY):
+            raise ValueError(f"Unknown classifier mode: {mode}")
+
+        gt = (levels > red_threshold).astype(np.uint32)
+        lt = (levels < red_threshold).astype(np.uint32)
+        self._table_r = levels * 38 | (gt * _R_GT) << _LUM_BITS
+        self._table_g = levels * 75 | (gt * _G_GT | lt * _G_LT) << _LUM_BITS
+        self._table_b = levels * 15 | (gt * _B_GT) << _LUM_BITS
+
+        weighted = np.arange(1 << _LUM_BITS, dtype=np.uint32)
+        luminance = weighted >> 7
+        flags = np.arange(16, dtype=np.uint32)[:, None]
+        r_gt = (flags & _R_GT) != 0
+        g_gt = (flags & _G_GT) != 0
+        g_lt = (flags & _G_LT) != 0
+        b_gt = (flags & _B_GT) != 0
+
+        if mode == MODE_BWRY:
+            is_white = luminance > threshold
+            is_green = g_gt & ~(r_gt & b_gt)
+            is_red = r_gt & ~is_white
+            # 00: Black, 01: White, 10: Yellow, 11: Red
+            classes = np.where(is_green, 2, np.where(is_red, 3, is_white))
+        else:
+            if mode == MODE_BWR_INVERT:
+                is_white = luminance < threshold
+            else:
+                is_white = luminance > threshold
+            is_red = r_gt & g_lt
+            classes = (is_white * CLASS_WHITE) | (is_red * CLASS_RED)
+
+        self._classes = np.ascontiguousarray(classes, dtype=np.uint8).reshape(-1)
+
+    def classify(self, rgb: np.ndarray) -> np.ndarray:
+        """Return a (height, width) uint8 class map."""
+        r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+        if self.mode == MODE_ETAG:
+            luminance = self._lum_r[r] + self._lum_g[g] + self._lum_b[b]
+            is_black = luminance < 200
+            is_red = (r > g) & (r > b) & (r > 100)
+            return (is_black * CLASS_BLACK | is_red * CLASS_RED).astype(np.uint8)
+        return self._classes[self._table_r[r] + self._table_g[g] + self._table_b[b]]
+
+
+@lru_cache(maxsize=8)
+def get_classifier(mode: str, threshold: int = 128, red_threshold: int = 128) -> ColorClassifier:
+    """Return the (cached) classifier for a mode and threshold pair."""
+    return ColorClassifier(mode, int(threshold), int(red_threshold))
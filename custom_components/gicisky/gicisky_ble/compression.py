@@ -10,14 +10,19 @@ Compression utilities for BLE image transfer.
 """
 from __future__ import annotations
 
+from concurrent.futures import Executor
 import struct
 
+from .cache import FrameCache
+
 _CWORD_LEN = 4
 _HASH_VALUES = 4096
 _MINOFFSET = 2
 _UNCONDITIONAL_MATCHLEN_COMPRESSOR = 12
 _UNCOMPRESSED_END = 4
 _CHUNK_SIZE = 64
+_CHUNK_CACHE_MAX_BYTES = 512 * 1024
+_BATCH_CHUNKS = 128  # executor 작업 하나가 압축하는 청크 수 (8 KiB)
 
 
 # ---------------------------------------------------------------------------
@@ -27,13 +32,6 @@ def _hash_func(fetch: int) -> int:
     return ((fetch >> 12) ^ fetch) & (_HASH_VALUES - 1)
 
 
-def _fast_read_3(data, pos: int) -> int:
-    """3바이트를 LE uint24로 읽기."""
-    if pos + 3 > len(data):
-        return 0
-    return data[pos] | (data[pos + 1] << 8) | (data[pos + 2] << 16)
-
-
 def _same(data, pos: int, n: int) -> bool:
     """pos에서 n+1 바이트가 모두 동일한지 확인."""
     if pos < 0 or pos + n >= len(data):
@@ -53,114 +51,221 @@ def _qlz_compress_core(source) -> bytes | None:
     QuickLZ Level 1 core 압축.
     압축이 이득이 없으면 None 반환.
     """
-    size = len(source)
-    last_byte_idx = size - 1
-    last_matchstart = last_byte_idx - _UNCONDITIONAL_MATCHLEN_COMPRESSOR - _UNCOMPRESSED_END
+    return Compressor().compress_core(source)
 
-    if last_matchstart < 0:
-        return None  # 너무 작아서 압축 불가
 
-    out = bytearray(size * 2 + 400)
-    cword_ptr = 0
-    dst = _CWORD_LEN
-    cword_val = 1 << 31
-    src = 0
-    lits = 0
+class Compressor:
+    """
+    compress2 형식 압축기.
 
-    # 해시 테이블: offset, cache
-    h_offset = [0] * _HASH_VALUES
-    h_cache = [0] * _HASH_VALUES
+    해시 테이블은 세대(generation) 카운터로 초기화하고 (청크마다 새 리스트를 만들지 않음),
+    core 출력 버퍼와 레코드 출력 버퍼는 청크 간에 재사용한다.
+    스레드 간에 공유하지 않는다 (작업마다 하나씩 생성).
+    """
 
-    while src <= last_matchstart:
-        # cword 플러시 검사
-        if (cword_val & 1) == 1:
-            # 압축률 검사
-            if src > (size >> 1) and (dst > src - (src >> 5)):
-                return None
-            struct.pack_into("<I", out, cword_ptr, (cword_val >> 1) | (1 << 31))
-            cword_ptr = dst
-            dst += _CWORD_LEN
-            cword_val = 1 << 31
-
-        fetch = _fast_read_3(source, src)
-        h = _hash_func(fetch)
-        cached = fetch ^ h_cache[h]
-        h_cache[h] = fetch
-        o = h_offset[h]
-        h_offset[h] = src
-
-        dist = src - o
-        if (cached & 0xFFFFFF) == 0 and o != 0 and (
-            dist > _MINOFFSET
-            or (
-                src == o + 1
-                and lits >= 3
-                and src > 3
-                and _same(source, src - 3, 6)
-            )
-        ):
-            # 매치 발견
-            matchlen = 3
-            remaining = min(255, last_byte_idx - _UNCOMPRESSED_END - src + 1)
-            while matchlen < remaining and source[src + matchlen] == source[o + matchlen]:
-                matchlen += 1
-
-            h_shifted = h << 4
-            cword_val = (cword_val >> 1) | (1 << 31)
-
-            if matchlen < 18:
-                # Short match: 2바이트
-                val = (matchlen - 2) | h_shifted
-                out[dst] = val & 0xFF
-                out[dst + 1] = (val >> 8) & 0xFF
-                dst += 2
+    def __init__(self) -> None:
+        self._h_offset = [0] * _HASH_VALUES
+        self._h_cache = [0] * _HASH_VALUES
+        self._h_gen = [0] * _HASH_VALUES
+        self._gen = 0
+        self._scratch = bytearray(_CHUNK_SIZE * 2 + 400)
+        self._out = bytearray()
+
+    def compress(self, data, force_raw: bool = False) -> bytes:
+        """[4B LE part2 원본 길이] + part1 청크들 + part2 청크들."""
+        view = memoryview(data)
+        split = len(view) // 2
+        out = self._out
+        del out[:]
+        out += struct.pack("<I", len(view) - split)
+        self._add_chunks(view[:split], force_raw)
+        self._add_chunks(view[split:], force_raw)
+        return bytes(out)
+
+    def compress_chunked(self, data, force_raw: bool = False) -> bytes:
+        """64바이트 청크 레코드들 (헤더 없음)."""
+        del self._out[:]
+        self._add_chunks(memoryview(data), force_raw)
+        return bytes(self._out)
+
+    def compress_core(self, source) -> bytes | None:
+        size = self._compress_core(source)
+        return None if size < 0 else bytes(self._scratch[:size])
+
+    def _add_chunks(self, view: memoryview, force_raw: bool) -> None:
+        """
+        64바이트 청크마다 QuickLZ L1 압축해서 출력 버퍼에 추가.
+        균일 청크는 미리 계산한 레코드를 그대로 사용 (part 전체가 균일하면 한 번에 반복),
+        나머지는 chunk_cache (LRU)를 먼저 조회.
+        """
+        out = self._out
+        size = len(view)
+        full = size - size % _CHUNK_SIZE
+        if force_raw:
+            for i in range(0, size, _CHUNK_SIZE):
+                self._add_record(view[i : i + _CHUNK_SIZE], True)
+            return
+
+        if full and view[:_CHUNK_SIZE] == _UNIFORM_CHUNKS[view[0]] and view[_CHUNK_SIZE:full] == view[: full - _CHUNK_SIZE]:
+            # part 전체가 균일 (예: 빈 red plane)
+            out += _uniform_record(view[0]) * (full // _CHUNK_SIZE)
+            if full < size:
+                self._add_record(view[full:])
+            return
+
+        for i in range(0, size, _CHUNK_SIZE):
+            chunk = view[i : i + _CHUNK_SIZE]
+            first = chunk[0]
+            if chunk == _UNIFORM_CHUNKS[first]:
+                out += _uniform_record(first)
+                continue
+            key = bytes(chunk)
+            record = chunk_cache.get(key)
+            if record is None:
+                start = len(out)
+                self._add_record(key)
+                chunk_cache.put(key, out[start:])
             else:
-                # Long match: 3바이트
-                out[dst] = h_shifted & 0xFF
-                out[dst + 1] = (h_shifted >> 8) & 0xFF
-                out[dst + 2] = matchlen & 0xFF
-                dst += 3
-
-            src += matchlen
-            lits = 0
-        else:
-            # 리터럴
-            lits += 1
+                out += record
+
+    def _add_record(self, chunk, force_raw: bool = False) -> None:
+        """
+        청크 하나의 레코드 추가: [0x75|0x74, total_len, 원본 길이] + 데이터.
+        압축 결과는 _qlz_decompress_core로 round-trip 검증하고, 일치하지 않으면 0x74로 전송.
+        """
+        out = self._out
+        n = len(chunk)
+        size = -1 if force_raw else self._compress_core(chunk)
+        if size >= 0:
+            compressed = self._scratch[:size]
+            if _qlz_decompress_core(compressed, n) == chunk:
+                # 압축 청크
+                out += bytes((0x75, (3 + size) & 0xFF, n & 0xFF))
+                out += compressed
+                return
+        # 비압축 청크 (raw)
+        out += bytes((0x74, (3 + n) & 0xFF, n & 0xFF))
+        out += chunk
+
+    def _compress_core(self, source) -> int:
+        """source를 scratch 버퍼에 압축하고 길이 반환. 압축이 이득이 없으면 -1."""
+        size = len(source)
+        last_byte_idx = size - 1
+        last_matchstart = last_byte_idx - _UNCONDITIONAL_MATCHLEN_COMPRESSOR - _UNCOMPRESSED_END
+
+        if last_matchstart < 0:
+            return -1  # 너무 작아서 압축 불가
+
+        if len(self._scratch) < size * 2 + 400:
+            self._scratch = bytearray(size * 2 + 400)
+        out = self._scratch
+        cword_ptr = 0
+        dst = _CWORD_LEN
+        cword_val = 1 << 31
+        src = 0
+        lits = 0
+
+        # 해시 테이블: offset, cache (현재 세대가 아닌 항목은 0으로 취급)
+        h_offset = self._h_offset
+        h_cache = self._h_cache
+        h_gen = self._h_gen
+        self._gen += 1
+        gen = self._gen
+
+        while src <= last_matchstart:
+            # cword 플러시 검사
+            if (cword_val & 1) == 1:
+                # 압축률 검사
+                if src > (size >> 1) and (dst > src - (src >> 5)):
+                    return -1
+                struct.pack_into("<I", out, cword_ptr, (cword_val >> 1) | (1 << 31))
+                cword_ptr = dst
+                dst += _CWORD_LEN
+                cword_val = 1 << 31
+
+            fetch = source[src] | (source[src + 1] << 8) | (source[src + 2] << 16)
+            h = ((fetch >> 12) ^ fetch) & (_HASH_VALUES - 1)
+            if h_gen[h] == gen:
+                cached = fetch ^ h_cache[h]
+                o = h_offset[h]
+            else:
+                h_gen[h] = gen
+                cached = fetch
+                o = 0
+            h_cache[h] = fetch
+            h_offset[h] = src
+
+            dist = src - o
+            if (cached & 0xFFFFFF) == 0 and o != 0 and (
+                dist > _MINOFFSET
+                or (
+                    src == o + 1
+                    and lits >= 3
+                    and src > 3
+                    and _same(source, src - 3, 6)
+                )
+            ):
+                # 매치 발견
+                matchlen = 3
+                remaining = min(255, last_byte_idx - _UNCOMPRESSED_END - src + 1)
+                while matchlen < remaining and source[src + matchlen] == source[o + matchlen]:
+                    matchlen += 1
+
+                h_shifted = h << 4
+                cword_val = (cword_val >> 1) | (1 << 31)
+
+                if matchlen < 18:
+                    # Short match: 2바이트
+                    val = (matchlen - 2) | h_shifted
+                    out[dst] = val & 0xFF
+                    out[dst + 1] = (val >> 8) & 0xFF
+                    dst += 2
+                else:
+                    # Long match: 3바이트
+                    out[dst] = h_shifted & 0xFF
+                    out[dst + 1] = (h_shifted >> 8) & 0xFF
+                    out[dst + 2] = matchlen & 0xFF
+                    dst += 3
+
+                src += matchlen
+                lits = 0
+            else:
+                # 리터럴
+                lits += 1
+                out[dst] = source[src]
+                src += 1
+                dst += 1
+                cword_val = cword_val >> 1
+
+        # 나머지 바이트들 (리터럴)
+        while src <= last_byte_idx:
+            if (cword_val & 1) == 1:
+                struct.pack_into("<I", out, cword_ptr, (cword_val >> 1) | (1 << 31))
+                cword_ptr = dst
+                dst += _CWORD_LEN
+                cword_val = 1 << 31
+
+            # 해시 업데이트 (마지막 3바이트 이전까지)
+            if src <= last_byte_idx - 2:
+                f = source[src] | (source[src + 1] << 8) | (source[src + 2] << 16)
+                hh = ((f >> 12) ^ f) & (_HASH_VALUES - 1)
+                h_gen[hh] = gen
+                h_cache[hh] = f
+                h_offset[hh] = src
+
             out[dst] = source[src]
             src += 1
             dst += 1
             cword_val = cword_val >> 1
 
-    # 나머지 바이트들 (리터럴)
-    while src <= last_byte_idx:
-        if (cword_val & 1) == 1:
-            struct.pack_into("<I", out, cword_ptr, (cword_val >> 1) | (1 << 31))
-            cword_ptr = dst
-            dst += _CWORD_LEN
-            cword_val = 1 << 31
-
-        # 해시 업데이트 (마지막 3바이트 이전까지)
-        if src <= last_byte_idx - 2:
-            f = _fast_read_3(source, src)
-            hh = _hash_func(f)
-            h_cache[hh] = f
-            h_offset[hh] = src
-
-        out[dst] = source[src]
-        src += 1
-        dst += 1
-        cword_val = cword_val >> 1
-
-    # 최종 cword 플러시
-    while (cword_val & 1) != 1:
-        cword_val = cword_val >> 1
-    struct.pack_into("<I", out, cword_ptr, (cword_val >> 1) | (1 << 31))
-
-    compressed_size = dst
-    if compressed_size >= size:
-        return None  # 압축 이득 없음
+        # 최종 cword 플러시
+        while (cword_val & 1) != 1:
+            cword_val = cword_val >> 1
+        struct.pack_into("<I", out, cword_ptr, (cword_val >> 1) | (1 << 31))
 
-    return bytes(out[:compressed_size])
+        if dst >= size:
+            return -1  # 압축 이득 없음
+        return dst
 
 
 # ---------------------------------------------------------------------------
@@ -168,15 +273,11 @@ def _qlz_compress_core(source) -> bytes | None:
 # ---------------------------------------------------------------------------
 def _update_hash(out, hash_offset, last_hashed: int, limit: int, dest_size: int) -> int:
     """해시 테이블 업데이트: last_hashed+1 부터 limit 까지. 갱신된 last_hashed 반환."""
-    while last_hashed < limit:
-        pos = last_hashed + 1
-        if pos + 3 > dest_size:
-            break
+    end = min(limit, dest_size - 3)
+    for pos in range(last_hashed + 1, end + 1):
         fh = out[pos] | (out[pos + 1] << 8) | (out[pos + 2] << 16)
-        hh = _hash_func(fh)
-        hash_offset[hh] = pos
-        last_hashed = pos
-    return last_hashed
+        hash_offset[((fh >> 12) ^ fh) & (_HASH_VALUES - 1)] = pos
+    return max(last_hashed, end)
 
 
 def _qlz_decompress_core(stream, dest_size: int) -> bytes:
@@ -202,7 +303,7 @@ def _qlz_decompress_core(stream, dest_size: int) -> bytes:
         if cword_val == 1:
             if src + _CWORD_LEN > n:
                 break
-            cword_val = struct.unpack("<I", stream[src : src + _CWORD_LEN])[0]
+            cword_val = stream[src] | (stream[src + 1] << 8) | (stream[src + 2] << 16) | (stream[src + 3] << 24)
             src += _CWORD_LEN
 
         if (cword_val & 1) == 1:
@@ -231,123 +332,174 @@ def _qlz_decompress_core(stream, dest_size: int) -> bytes:
             # 해시 테이블에서 소스 위치 조회
             offset2 = hash_offset[h]
 
-            # 매치 복사
+            # 매치 복사 (겹치지 않으면 슬라이스 한 번, 겹치면 바이트 단위로 패턴 반복)
             match_start = dst
-            for _ in range(matchlen):
-                if dst > last_dst:
-                    break
-                if 0 <= offset2 < dest_size:
-                    out[dst] = out[offset2]
-                offset2 += 1
-                dst += 1
+            count = min(matchlen, last_dst - dst + 1)
+            if offset2 + count <= dst:
+                out[dst : dst + count] = out[offset2 : offset2 + count]
+            else:
+                for i in range(count):
+                    if offset2 + i < dest_size:
+                        out[dst + i] = out[offset2 + i]
+            dst += count
 
             # 매치 후 해시 업데이트: match_start 까지 (복사된 데이터 포함)
-            last_hashed = _update_hash(out, hash_offset, last_hashed, match_start, dest_size)
+            _update_hash(out, hash_offset, last_hashed, match_start, dest_size)
             last_hashed = dst - 1
         else:
-            # 리터럴
-            cword_val >>= 1
-            if src >= n:
+            # 리터럴: cword의 연속된 0 비트만큼 한 번에 복사 (cword 0 = 남은 전부 리터럴)
+            run = ((cword_val & -cword_val).bit_length() - 1) if cword_val else dest_size
+            run = min(run, last_dst - dst + 1, n - src)
+            if run <= 0:
                 break
-            out[dst] = stream[src]
-            dst += 1
-            src += 1
+            out[dst : dst + run] = stream[src : src + run]
+            cword_val >>= run
+            dst += run
+            src += run
 
-    return bytes(out[:dest_size])
+    return bytes(out)
 
 
 # ---------------------------------------------------------------------------
 # 청크 단위 압축/해제 래퍼
 # ---------------------------------------------------------------------------
+def _chunk_record(chunk, force_raw: bool = False) -> bytes:
+    """청크 하나의 레코드: [0x75|0x74, total_len, 원본 길이] + 데이터."""
+    compressor = Compressor()
+    compressor._add_record(chunk, force_raw)
+    return bytes(compressor._out)
+
+
+# 64바이트가 모두 같은 값인 청크 (흰 배경, 빈 red plane)
+_UNIFORM_CHUNKS = [bytes((value,)) * _CHUNK_SIZE for value in range(256)]
+_UNIFORM_RECORDS: dict[int, bytes] = {}
+
+# 청크 바이트 -> 검증된 레코드 (대시보드의 배경, 테두리, 반복되는 글자 행)
+chunk_cache = FrameCache(max_bytes=_CHUNK_CACHE_MAX_BYTES)
+
+
+def _uniform_record(value: int) -> bytes:
+    """균일 청크의 레코드 (바이트 값마다 한 번만 계산)."""
+    record = _UNIFORM_RECORDS.get(value)
+    if record is None:
+        record = _chunk_record(_UNIFORM_CHUNKS[value])
+        _UNIFORM_RECORDS[value] = record
+    return record
+
+
 def _compress_chunked(data: bytes, force_raw: bool = False) -> bytes:
     """
     64바이트 청크마다 QuickLZ L1 압축.
     0x75: 압축 청크, 0x74: 비압축 청크 (raw).
     force_raw=True이면 모든 청크를 0x74 (raw)로 전송.
+    executor 작업 단위로도 쓰인다 (최상위 함수라 프로세스 풀에서도 pickle 가능).
     """
-    output = bytearray()
-    for i in range(0, len(data), _CHUNK_SIZE):
-        chunk = data[i : i + _CHUNK_SIZE]
-        n = len(chunk)
-        compressed = None if force_raw else _qlz_compress_core(chunk)
-        if compressed is not None:
-            # 압축 청크
-            total_len = 3 + len(compressed)
-            output.append(0x75)
-            output.append(total_len & 0xFF)
-            output.append(n & 0xFF)
-            output.extend(compressed)
-        else:
-            # 비압축 청크 (raw)
-            total_len = 3 + n
-            output.append(0x74)
-            output.append(total_len & 0xFF)
-            output.append(n & 0xFF)
-            output.extend(chunk)
-    return bytes(output)
+    return Compressor().compress_chunked(data, force_raw)
 
 
-def compress(data: bytes, force_raw: bool = False) -> bytes:
+def compress(data: bytes, force_raw: bool = False, executor: Executor | None = None) -> bytes:
     """
     compress2 형식: 반으로 나눈 뒤 각 part를 64바이트 청크 QuickLZ L1으로 인코딩.
     출력: [4B LE part2 원본 길이] + part1 청크들 + part2 청크들.
     force_raw=True이면 모든 청크를 0x74 (raw)로 전송 (QuickLZ 비사용).
+    executor가 주어지면 두 part를 청크 배치로 나눠 동시에 압축한 뒤 순서대로 합친다
+    (청크는 서로 독립이므로 결과는 동일). raw 레코드는 복사뿐이라 항상 바로 만든다.
     """
-    total_len = len(data)
-    split = total_len // 2
-    part1 = data[:split]
-    part2 = data[split:]
-    compressed_part1 = _compress_chunked(part1, force_raw=force_raw)
-    compressed_part2 = _compress_chunked(part2, force_raw=force_raw)
-    header = struct.pack("<I", len(part2))
-    return header + compressed_part1 + compressed_part2
+    view = memoryview(data)
+    if executor is None or force_raw:
+        return Compressor().compress(view, force_raw)
 
+    split = len(view) // 2
+    batch = _CHUNK_SIZE * _BATCH_CHUNKS
+    futures = [
+        executor.submit(_compress_chunked, bytes(part[i : i + batch]))
+        for part in (view[:split], view[split:])
+        for i in range(0, len(part), batch)
+    ]
+    return struct.pack("<I", len(view) - split) + b"".join(future.result() for future in futures)
 
-def _decompress_chunks(payload: bytes, start: int, max_bytes: int) -> tuple[bytes, int]:
+
+def _decompress_chunks(payload, start: int, max_bytes: int) -> tuple[bytes, int]:
     """
     청크 스트림 해제. start 위치부터 max_bytes 만큼 해제 후 (결과, 소비 위치) 반환.
+    같은 레코드(흰 배경, 반복되는 행)는 한 번만 해제한다.
+    전송 전 검증용이라 엄격하게 해제: 0x74/0x75가 아닌 바이트, 잘못된 total_len / 원본 길이,
+    잘린 레코드는 ValueError.
     """
-    out = bytearray()
+    view = memoryview(payload)
+    size = len(view)
+    out = bytearray(max_bytes)
+    filled = 0
+    decoded: dict[bytes, bytes] = {}
     pos = start
-    while pos + 3 <= len(payload) and len(out) < max_bytes:
-        magic = payload[pos]
+    while filled < max_bytes:
+        if pos + 3 > size:
+            raise ValueError(f"Truncated chunk record at {pos}")
+        magic = view[pos]
+        total_len = view[pos + 1]
+        uncompressed_size = view[pos + 2]
         if magic not in (0x74, 0x75):
-            pos += 1
-            continue
-        total_len = payload[pos + 1]
-        if total_len < 6 or total_len > 80:
-            # 최소 6 (3헤더+최소 데이터), 최대 ~80 (압축 오버헤드 포함).
-            pos += 1
-            continue
-        if pos + total_len > len(payload):
-            break
-        uncompressed_size = payload[pos + 2]
-        if uncompressed_size != _CHUNK_SIZE:
-            # 모든 유효 청크는 64바이트 해제
-            pos += 1
-            continue
-        stream = payload[pos + 3 : pos + total_len]
+            raise ValueError(f"Invalid chunk record 0x{magic:02x} at {pos}")
+        # 모든 청크는 64바이트 해제 (part의 마지막 청크만 더 짧을 수 있음)
+        if uncompressed_size != min(_CHUNK_SIZE, max_bytes - filled):
+            raise ValueError(f"Invalid chunk size {uncompressed_size} at {pos}")
+        if (
+            total_len != 3 + uncompressed_size
+            if magic == 0x74
+            else not 3 + _CWORD_LEN <= total_len <= 80  # 최대 ~80 (압축 오버헤드 포함)
+        ):
+            raise ValueError(f"Invalid chunk record length {total_len} at {pos}")
+        if pos + total_len > size:
+            raise ValueError(f"Truncated chunk record at {pos}")
+        stream = view[pos + 3 : pos + total_len]
         if magic == 0x74:
-            out.extend(stream[:uncompressed_size])
+            chunk = stream
         else:
-            chunk = _qlz_decompress_core(stream, uncompressed_size)
-            out.extend(chunk)
+            key = stream.tobytes()
+            chunk = decoded.get(key)
+            if chunk is None:
+                chunk = _qlz_decompress_core(key, uncompressed_size)
+                decoded[key] = chunk
+        out[filled : filled + uncompressed_size] = chunk
+        filled += uncompressed_size
         pos += total_len
-    return bytes(out[:max_bytes]), pos
+    return bytes(out), pos
 
 
 def decompress(payload: bytes) -> bytes:
     """
     compress2 형식 역연산: [4B part2 길이] + 0x74/0x75 청크들 → 원본 바이트.
     0x74: 비압축 (raw 복사), 0x75: QuickLZ L1 해제.
-    part2_len으로 part 경계를 올바르게 분리.
+    part2_len으로 part 경계를 올바르게 분리 (대칭 분할).
+    형식이 맞지 않거나 part 2 뒤에 바이트가 남으면 ValueError.
     """
     if len(payload) < 4:
-        return b""
-    part2_len = struct.unpack("<I", payload[:4])[0]
+        raise ValueError("Truncated compress2 payload")
+    part2_len = struct.unpack_from("<I", payload)[0]
     if part2_len == 0:
-        part2_len = len(payload)  # fallback
-    part1_len = part2_len  # 대칭 분할
-    part1, next_pos = _decompress_chunks(payload, 4, part1_len)
-    part2, _ = _decompress_chunks(payload, next_pos, part2_len)
+        raise ValueError("Empty compress2 payload")
+    part1, next_pos = _decompress_chunks(payload, 4, part2_len)
+    part2, end = _decompress_chunks(payload, next_pos, part2_len)
+    if end != len(payload):
+        raise ValueError(f"{len(payload) - end} bytes left after part 2")
     return part1 + part2
+
+
+def count_records(payload) -> tuple[int, int]:
+    """
+    [4B 길이] 뒤의 레코드 [0x74|0x75, total_len, 원본 길이] + 데이터를 세어
+    (0x74 개수, 0x75 개수) 반환. compress2 청크와 7.5" 컬럼 레코드 모두 같은 헤더를 쓴다.
+    """
+    raw = compressed = 0
+    pos = 4
+    while pos + 3 <= len(payload):
+        magic = payload[pos]
+        total_len = payload[pos + 1]
+        if magic not in (0x74, 0x75) or total_len < 3:
+            break
+        if magic == 0x74:
+            raw += 1
+        else:
+            compressed += 1
+        pos += total_len
+    return raw, compressed
@@ -1,5 +1,7 @@
 import dataclasses
 
+# IMAGE_DATA part payload size (bytes)
+PART_SIZE = 240
 
 @dataclasses.dataclass
 class DeviceEntry:
@@ -0,0 +1,361 @@
+"""
+Gicisky frame encoders.
+
+렌더링된 이미지를 디바이스 payload로 변환 (BLE 연결 없이 사용 가능).
+- BW / BWR: 1-bit plane (red plane은 support_red일 때만)
+- compression=True (7.5"): 컬럼 단위 0x75 레코드
+- compression2=True (10.2"): dual plane + compress2 형식
+- four_color: 2-bit BWRY
+
+decode_classes() / payload_to_image()는 모든 payload를 다시 색상 class / 팔레트 이미지로
+복원한다 (전송 전 검증과 미리보기용).
+"""
+from __future__ import annotations
+
+from concurrent.futures import Executor
+import logging
+import struct
+
+import numpy as np
+from PIL import Image
+
+from .devices import PART_SIZE, DeviceEntry
+from .geometry import compile_plan
+from .classify import (
+    CLASS_RED,
+    CLASS_WHITE,
+    MODE_BWR,
+    MODE_BWR_INVERT,
+    MODE_BWRY,
+    get_classifier,
+)
+from .cache import frame_cache, frame_key
+from .compression import (
+    Compressor,
+    _qlz_decompress_core,
+    compress as compress_data,
+    count_records,
+    decompress,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# payload_to_image() palette: index 0 black, 1 white, 2 red, 3 yellow
+PREVIEW_PALETTE = (
+    (0, 0, 0),
+    (255, 255, 255),
+    (255, 0, 0),
+    (255, 255, 0),
+)
+# BWRY class (0 black, 1 white, 2 yellow, 3 red) -> palette index
+_BWRY_PALETTE_INDEX = np.array((0, 1, 3, 2), dtype=np.uint8)
+
+
+def encode_image(
+    device: DeviceEntry,
+    image: Image.Image,
+    threshold: int,
+    red_threshold: int,
+    rotate: int = 0,
+    part_rtt: float | None = None,
+) -> bytes:
+    """Encode a rendered frame into the payload sent to the device."""
+    return ImageEncoder(device, part_rtt=part_rtt).encode(image, threshold, red_threshold, rotate)
+
+
+def encode_frame(
+    device: DeviceEntry,
+    image: Image.Image,
+    threshold: int,
+    red_threshold: int,
+    rotate: int = 0,
+    executor: Executor | None = None,
+    part_rtt: float | None = None,
+) -> bytes:
+    """Encode a rendered frame without the frame cache.
+
+    Top-level (picklable) entry point for process pool workers: the caller
+    owns the cache lookup, since each worker process has its own frame_cache.
+    executor: compress compression2 chunk batches on this pool instead of inline.
+    part_rtt: measured seconds per IMAGE_DATA part, used to log transfer time estimates.
+    """
+    return ImageEncoder(device, executor, part_rtt)._make_image_packet(image, threshold, red_threshold, rotate)
+
+
+class ImageEncoder:
+    def __init__(
+        self,
+        device: DeviceEntry,
+        executor: Executor | None = None,
+        part_rtt: float | None = None,
+    ) -> None:
+        self.device = device
+        self.executor = executor
+        self.part_rtt = part_rtt
+        self.width = device.width
+        self.height = device.height
+        self.support_red = device.red
+        self.compression = device.compression
+        self.compression2 = device.compression2
+        self.invert_luminance = device.invert_luminance
+        self.four_color = device.four_color
+        if self.four_color:
+            self.classifier_mode = MODE_BWRY
+        elif self.compression2 or not self.invert_luminance:
+            self.classifier_mode = MODE_BWR
+        else:
+            self.classifier_mode = MODE_BWR_INVERT
+
+    def encode(self, image: Image.Image, threshold: int, red_threshold: int, rotate: int = 0) -> bytes:
+        """Return the device payload for a rendered frame (served from the frame cache when possible)."""
+        key = frame_key(image, self.device.model, threshold, red_threshold, rotate)
+        payload = frame_cache.get(key)
+        if payload is None:
+            payload = self._make_image_packet(image, threshold, red_threshold, rotate)
+            frame_cache.put(key, payload)
+        _LOGGER.debug("Frame cache: %s", frame_cache.stats())
+        return payload
+
+    def _make_image_packet(self, image: Image.Image, threshold: int, red_threshold: int, rotate: int = 0) -> bytes:
+        payload = self._encode(image, threshold, red_threshold, rotate)
+        _LOGGER.debug("%s payload: %s", self.device.model, self._estimate(len(payload)))
+        return payload
+
+    def _encode(self, image: Image.Image, threshold: int, red_threshold: int, rotate: int = 0) -> bytes:
+        # overlay, TFT resize, rotation and mirroring in one precompiled pass
+        rgb = compile_plan(self.device, rotate).apply(image)
+        classes = get_classifier(self.classifier_mode, threshold, red_threshold).classify(rgb)
+
+        if self.four_color:
+            return self._make_four_color_packet(classes)
+
+        planes = self._pack_planes(classes)
+        if self.compression2:
+            return self._compress_byte_data_2(planes)
+
+        plane_size = len(planes) // 2
+        byte_data = planes[:plane_size]
+        byte_data_red = planes[plane_size:]
+
+        if self.compression:
+            return self._compress_byte_data(byte_data, byte_data_red)
+
+        return bytes(planes) if self.support_red else bytes(byte_data)
+
+    def _estimate(self, size: int) -> str:
+        """Payload size, IMAGE_DATA parts and (with a measured part RTT) transfer time."""
+        parts = -(-size // PART_SIZE)
+        if self.part_rtt:
+            return f"{size} B / {parts} parts / ~{parts * self.part_rtt:.1f} s"
+        return f"{size} B / {parts} parts"
+
+    def _pack_planes(self, classes: np.ndarray) -> memoryview:
+        """1-bit BW plane (1=white) followed by the red plane (1=red).
+
+        MSB first, row-major; each plane's last byte is zero padded like the old bit loop.
+        Both planes are packed into one contiguous buffer: no bw + red concatenation copy.
+        """
+        planes = np.stack((classes & CLASS_WHITE, classes & CLASS_RED))
+        return memoryview(np.packbits(planes.reshape(2, -1), axis=1).reshape(-1))
+
+    def _make_four_color_packet(self, classes: np.ndarray) -> bytes:
+        """2-bit per pixel BWRY packing, four pixels per byte (first pixel in the high bits)."""
+        values = classes.reshape(-1)
+
+        # A trailing partial byte is dropped, as before
+        quads = values[: values.size - values.size % 4].reshape(-1, 4)
+        packed = (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+        return packed.tobytes()
+    
+    def _compress_byte_data(self, byte_data: memoryview, byte_data_red: memoryview | None) -> bytes:
+        """
+        컬럼 단위 레코드: [0x75, total_len, byte_per_line] + QuickLZ L1 core.
+        압축 이득이 없거나 round-trip이 일치하지 않는 컬럼은 기존 리터럴 레이아웃
+        (cword 0x00000000 + 원본 바이트, 모두 리터럴인 core)으로 전송.
+        """
+        byte_per_line = self.height // 8
+        literal_header = bytes((
+            0x75,
+            byte_per_line + 7,
+            byte_per_line,
+            0x00, 0x00, 0x00, 0x00
+        ))
+        compressor = Compressor()
+        # 같은 컬럼(흰 여백, 빈 red plane)은 프레임 안에서 한 번만 압축
+        records: dict[bytes, bytes] = {}
+        buf = bytearray(4)
+        for plane in (byte_data, byte_data_red):
+            if plane is None:
+                continue
+            pos = 0
+            for _ in range(self.width):
+                column = bytes(plane[pos:pos + byte_per_line])
+                record = records.get(column)
+                if record is None:
+                    core = compressor.compress_core(column)
+                    if core is not None and _qlz_decompress_core(core, len(column)) == column:
+                        record = bytes((0x75, 3 + len(core), len(column))) + core
+                    else:
+                        record = literal_header + column
+                    records[column] = record
+                buf += record
+                pos += byte_per_line
+
+        struct.pack_into("<I", buf, 0, len(buf))
+        return bytes(buf)
+
+    def _compress_byte_data_2(self, raw: memoryview) -> bytes:
+        """Compress the dual plane BWR buffer from _pack_planes(). Used when compression2=True.
+
+        Part1: BW plane (1=white, 0=black), MSB first, row-major
+        Part2: Red plane (1=red, 0=not red), MSB first, row-major
+        """
+        try:
+            compressed = compress_data(raw, executor=self.executor)
+            # compress_data 반환: [4B part2_len] + compressed_part1 + compressed_part2
+            # prefix 없이 그대로 반환 (7.5"의 total_len 헤더와 동일한 위치)
+            _LOGGER.debug(
+                "Compress (1-bit dual plane BWR): raw=%s -> %s bytes, head32=%s",
+                len(raw),
+                len(compressed),
+                compressed[:32].hex() if len(compressed) >= 32 else compressed.hex(),
+            )
+            return compressed
+        except Exception as e:
+            _LOGGER.warning("Compression failed: %s. Using uncompressed data.", e)
+            return bytes(raw)
+
+
+def payload_stats(device: DeviceEntry, payload: bytes) -> dict[str, int]:
+    """
+    payload 통계: 원본 plane 크기, 인코딩 크기, 0x74 / 0x75 레코드 수, IMAGE_DATA part 수.
+    (7.5" 리터럴 컬럼도 0x75 레코드로 전송되므로 0x75로 센다)
+    """
+    pixels = device.width * device.height
+    if device.four_color:
+        raw_size = pixels // 4
+    elif device.compression or device.compression2 or device.red:
+        raw_size = 2 * (-(-pixels // 8))
+    else:
+        raw_size = -(-pixels // 8)
+    raw_chunks, compressed_chunks = (
+        count_records(payload) if device.compression or device.compression2 else (0, 0)
+    )
+    return {
+        "raw_size": raw_size,
+        "encoded_size": len(payload),
+        "raw_chunks": raw_chunks,
+        "compressed_chunks": compressed_chunks,
+        "parts": -(-len(payload) // PART_SIZE),
+    }
+
+
+def decompress_byte_data(payload: bytes, width: int, height: int) -> tuple[list[int], list[int] | None]:
+    """
+    _compress_byte_data() 출력 형식의 역연산.
+    compression=True 디바이스(예: 7.5" 0x2B) 패킷을 복원해 (byte_data, byte_data_red) 반환.
+    byte_data_red는 없으면 None.
+    """
+    byte_data, byte_data_red = _decompress_columns(payload, width, height)
+    return (list(byte_data), None if byte_data_red is None else list(byte_data_red))
+
+
+def _decompress_columns(payload, width: int, height: int) -> tuple[bytes, bytes | None]:
+    """
+    컬럼 레코드 [0x75, total_len, 원본 길이] + core를 QuickLZ L1로 해제해 plane 버퍼로 복원
+    (리터럴 레이아웃은 cword 0인 core로 그대로 해제된다).
+    같은 레코드(흰 여백, 빈 red plane)는 한 번만 해제한다.
+    헤더 길이가 맞지 않거나, 레코드가 잘못되었거나, plane 뒤에 바이트가 남으면 ValueError.
+    """
+    if len(payload) < 4 or struct.unpack_from("<I", payload)[0] != len(payload):
+        raise ValueError("Column payload length header does not match the payload")
+    view = memoryview(payload)
+    byte_per_line = height // 8
+    decoded: dict[bytes, bytes] = {}
+    pos = 4
+
+    def read_plane() -> bytes:
+        nonlocal pos
+        plane = bytearray(width * byte_per_line)
+        filled = 0
+        for _ in range(width):
+            if pos + 3 > len(view) or view[pos] != 0x75:
+                raise ValueError(f"Invalid column record at {pos}")
+            total_len = view[pos + 1]
+            size = view[pos + 2]
+            # 최소 7 (3B 헤더 + 4B cword)
+            if size != byte_per_line or total_len < 7 or pos + total_len > len(view):
+                raise ValueError(f"Invalid column record at {pos}")
+            record = view[pos : pos + total_len].tobytes()
+            column = decoded.get(record)
+            if column is None:
+                column = _qlz_decompress_core(record[3:], size)
+                decoded[record] = column
+            plane[filled : filled + size] = column
+            filled += size
+            pos += total_len
+        return bytes(plane)
+
+    byte_data = read_plane()
+    byte_data_red: bytes | None = None
+    if pos < len(view):
+        byte_data_red = read_plane()
+    if pos != len(view):
+        raise ValueError(f"{len(view) - pos} bytes left after the planes")
+    return (byte_data, byte_data_red)
+
+
+def decode_classes(device: DeviceEntry, payload: bytes) -> np.ndarray:
+    """
+    payload를 인코더가 받았던 (height, width) class map으로 복원 (디바이스 스캔 순서).
+    classify 결과와 같은 규칙: four_color는 BWRY class, 그 외는 bit0 = BW plane, bit1 = red plane.
+    payload가 프레임과 정확히 맞지 않으면 (잘못된 레코드, 남거나 모자란 바이트) ValueError.
+    """
+    width, height = compile_plan(device).frame_size
+    pixels = width * height
+
+    if device.four_color:
+        quads = np.frombuffer(payload, dtype=np.uint8)
+        if quads.size != pixels // 4:
+            raise ValueError(f"Payload holds {quads.size * 4} pixels, expected {pixels}")
+        values = np.ones(pixels, dtype=np.uint8)  # 잘린 마지막 부분 픽셀은 흰색
+        unpacked = np.stack((quads >> 6, quads >> 4, quads >> 2, quads), axis=1) & 0x03
+        values[: unpacked.size] = unpacked.reshape(-1)
+        return values.reshape(height, width)
+
+    plane_size = -(-pixels // 8)
+    if device.compression2:
+        raw = decompress(payload)
+        planes = (raw[:plane_size], raw[plane_size:])
+    elif device.compression:
+        planes = _decompress_columns(payload, device.width, device.height)
+    else:
+        if len(payload) != plane_size * (2 if device.red else 1):
+            raise ValueError(f"Payload holds {len(payload)} bytes, expected {plane_size} per plane")
+        planes = (payload[:plane_size], payload[plane_size:] if device.red else None)
+
+    bw, red = planes
+    if len(bw) != plane_size or (red is not None and len(red) != plane_size):
+        raise ValueError(f"Payload does not decode to {width}x{height} planes")
+    classes = np.unpackbits(np.frombuffer(bw, dtype=np.uint8), count=pixels)
+    if red is not None:
+        classes |= np.unpackbits(np.frombuffer(red, dtype=np.uint8), count=pixels) << 1
+    return classes.reshape(height, width)
+
+
+def payload_to_image(device: DeviceEntry, payload: bytes, rotate: int = 0) -> Image.Image:
+    """
+    payload를 패널이 실제로 표시할 팔레트("P") 이미지로 복원 (렌더링된 캔버스 방향).
+    palette: PREVIEW_PALETTE. red plane이 켜진 픽셀은 red (BW plane보다 우선).
+    """
+    classes = decode_classes(device, payload)
+    if device.four_color:
+        indices = _BWRY_PALETTE_INDEX[classes]
+    else:
+        white = (classes & CLASS_WHITE) != 0
+        if not device.compression2 and device.invert_luminance:
+            white = ~white
+        indices = np.where((classes & CLASS_RED) != 0, 2, white).astype(np.uint8)
+    frame = Image.fromarray(indices)
+    frame.putpalette([level for color in PREVIEW_PALETTE for level in color])
+    return compile_plan(device, rotate).invert(frame)
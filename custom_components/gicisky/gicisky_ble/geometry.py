@@ -0,0 +1,171 @@
+"""
+Per-model frame geometry.
+
+렌더링된 캔버스를 디바이스 스캔 순서로 바꾸는 과정(overlay, TFT resize, rotation,
+mirror_x/mirror_y)을 DeviceEntry마다 한 번만 계산해 둔다.
+90도 단위 회전과 미러링은 모두 정사각형의 대칭군(D4)에 속하므로
+하나의 Image.transpose 연산으로 합쳐진다.
+"""
+from __future__ import annotations
+
+import dataclasses
+
+import numpy as np
+from PIL import Image
+
+from .devices import DeviceEntry
+
+# (반시계 방향 90도 회전 횟수, 회전 후 좌우 반전) -> 단일 transpose 연산
+_TRANSPOSE: dict[tuple[int, bool], Image.Transpose | None] = {
+    (0, False): None,
+    (1, False): Image.Transpose.ROTATE_90,
+    (2, False): Image.Transpose.ROTATE_180,
+    (3, False): Image.Transpose.ROTATE_270,
+    (0, True): Image.Transpose.FLIP_LEFT_RIGHT,
+    (1, True): Image.Transpose.TRANSVERSE,
+    (2, True): Image.Transpose.FLIP_TOP_BOTTOM,
+    (3, True): Image.Transpose.TRANSPOSE,
+}
+
+# 역변환: 90/270도 회전만 서로 역이고 나머지(180도, 반전, 대각 반전)는 자기 자신이 역
+_INVERSE: dict[Image.Transpose, Image.Transpose] = {
+    Image.Transpose.ROTATE_90: Image.Transpose.ROTATE_270,
+    Image.Transpose.ROTATE_270: Image.Transpose.ROTATE_90,
+}
+
+# 가로/세로를 맞바꾸는 transpose
+_SWAPS_AXES = (
+    Image.Transpose.ROTATE_90,
+    Image.Transpose.ROTATE_270,
+    Image.Transpose.TRANSPOSE,
+    Image.Transpose.TRANSVERSE,
+)
+
+_PLANS: dict[tuple[str, int], GeometryPlan] = {}
+
+
+def _rotate(state: tuple[int, bool], turns: int) -> tuple[int, bool]:
+    """Compose a counter-clockwise rotation after the given transform."""
+    k, flip = state
+    # R(t) * F * R(k) == F * R(k - t)
+    return ((k - turns) % 4, True) if flip else ((k + turns) % 4, False)
+
+
+def _flip_lr(state: tuple[int, bool]) -> tuple[int, bool]:
+    """Compose a left-right flip (mirror_x) after the given transform."""
+    return (state[0], not state[1])
+
+
+def _flip_tb(state: tuple[int, bool]) -> tuple[int, bool]:
+    """Compose a top-bottom flip (mirror_y) after the given transform."""
+    return _flip_lr(_rotate(state, 2))
+
+
+def _turns(angle: int) -> int:
+    if angle % 90:
+        raise ValueError(f"Unsupported rotation: {angle}")
+    return (angle // 90) % 4
+
+
+@dataclasses.dataclass(frozen=True)
+class GeometryPlan:
+    """Precompiled canvas -> device scan order mapping for one model."""
+
+    canvas: tuple[int, int]
+    pre_transpose: Image.Transpose | None
+    resize: tuple[int, int] | None
+    transpose: Image.Transpose | None
+
+    def apply(self, image: Image.Image) -> np.ndarray:
+        """Return a (height, width, 3) uint8 array in device scan order."""
+        frame = self._overlay(image)
+        if self.pre_transpose is not None:
+            frame = frame.transpose(self.pre_transpose)
+        if self.resize is not None:
+            frame = frame.resize(self.resize, resample=Image.BICUBIC)
+        if self.transpose is not None:
+            frame = frame.transpose(self.transpose)
+        return np.asarray(frame)
+
+    @property
+    def frame_size(self) -> tuple[int, int]:
+        """(width, height) of the frame returned by apply(), i.e. the device scan order."""
+        size = _transposed_size(self.canvas, self.pre_transpose)
+        if self.resize is not None:
+            size = self.resize
+        return _transposed_size(size, self.transpose)
+
+    def invert(self, frame: Image.Image) -> Image.Image:
+        """Map a frame in device scan order back onto the canvas (inverse of apply()).
+
+        The TFT resize is undone with nearest neighbour sampling, so every canvas
+        pixel shows exactly one device pixel.
+        """
+        if self.transpose is not None:
+            frame = frame.transpose(_INVERSE.get(self.transpose, self.transpose))
+        if self.resize is not None:
+            frame = frame.resize(_transposed_size(self.canvas, self.pre_transpose), resample=Image.NEAREST)
+        if self.pre_transpose is not None:
+            frame = frame.transpose(_INVERSE.get(self.pre_transpose, self.pre_transpose))
+        return frame
+
+    def _overlay(self, image: Image.Image) -> Image.Image:
+        """Place the image at (0, 0) on a white canvas, cropping it to the canvas size."""
+        ov = image if image.mode == "RGB" else image.convert("RGB")
+        if ov.size == self.canvas:
+            return ov
+        w_base, h_base = self.canvas
+        if ov.width > w_base or ov.height > h_base:
+            # crop() covers the whole canvas (out of range areas become black)
+            return ov.crop((0, 0, w_base, h_base))
+        base = Image.new("RGB", self.canvas, color="white")
+        base.paste(ov, (0, 0))
+        return base
+
+
+def _transposed_size(size: tuple[int, int], transpose: Image.Transpose | None) -> tuple[int, int]:
+    return (size[1], size[0]) if transpose in _SWAPS_AXES else size
+
+
+def compile_plan(device: DeviceEntry, rotate: int = 0) -> GeometryPlan:
+    """
+    DeviceEntry의 geometry plan (model 별 캐시).
+
+    rotate: 렌더러가 캔버스에 적용하려던 시계 방향 회전 (customimage의 rotate).
+    plan에 합쳐지므로 호출자는 회전 전 캔버스를 그대로 넘기면 된다.
+    """
+    key = (device.model, rotate % 360)
+    plan = _PLANS.get(key)
+    if plan is not None:
+        return plan
+
+    # customimage의 img.rotate(-rotate): 시계 방향
+    pre = _rotate((0, False), -_turns(rotate))
+    if pre[0] % 2:
+        canvas = (device.height, device.width)
+    else:
+        canvas = (device.width, device.height)
+
+    resize = None
+    pre_transpose = None
+    state = pre
+    if device.tft:
+        # resize는 회전과 교환되지 않으므로 렌더러 회전을 먼저 적용
+        pre_transpose = _TRANSPOSE[pre]
+        state = (0, False)
+        resize = (device.width // 2, device.height * 2)
+
+    state = _rotate(state, _turns(device.rotation))
+    if device.mirror_y:
+        state = _flip_tb(state)
+    if device.mirror_x:
+        state = _flip_lr(state)
+
+    plan = GeometryPlan(
+        canvas=canvas,
+        pre_transpose=pre_transpose,
+        resize=resize,
+        transpose=_TRANSPOSE[state],
+    )
+    _PLANS[key] = plan
+    return plan
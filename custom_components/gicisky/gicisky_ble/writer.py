@@ -1,21 +1,33 @@
 # gicisky_ble.py
 
 from __future__ import annotations
+import dataclasses
 from enum import Enum
 import logging
 import struct
+import time
 from typing import Any, Callable, TypeVar
-from asyncio import Event, wait_for, sleep
-from PIL import Image
+from asyncio import Queue, QueueEmpty, wait_for, sleep
 from bleak import BleakClient, BleakError
 from bleak.backends.device import BLEDevice
 from bleak_retry_connector import establish_connection
 
-from .devices import DeviceEntry
-from .compression import compress as compress_data
+from .devices import PART_SIZE, DeviceEntry
 
 _LOGGER = logging.getLogger(__name__)
 
+# The START command doubles as the readiness check after enabling notifications:
+# it is repeated with a short timeout until the tag answers
+_READY_ATTEMPTS = 5
+_READY_TIMEOUT = 1.0
+# How long to wait for the real answer after a stale or duplicate one (an answer that
+# repeats a part index sooner than the tag can have answered the write)
+_DUPLICATE_GRACE = 0.3
+# Write pacing (seconds): AIMD on the delay after every write
+_PACE_STEP = 0.001  # taken off for every acknowledged part
+_PACE_BACKOFF = 0.01  # first delay after a stall from no delay
+_PACE_MAX = 0.2
+
 # 예외 정의
 class BleakCharacteristicMissing(BleakError):
     """Characteristic Missing"""
@@ -23,6 +35,43 @@ class BleakCharacteristicMissing(BleakError):
 class BleakServiceMissing(BleakError):
     """Service Missing"""
 
+class PartStalled(Exception):
+    """Part Stalled"""
+
+@dataclasses.dataclass
+class TransferStats:
+    """Measurements of the last image transfer, filled in by update_image()."""
+
+    parts: int = 0
+    part_rtt: float | None = None  # mean seconds from IMAGE_DATA write to the answer matching it
+    acked_parts: int = 0  # parts the tag acknowledged before the transfer ended
+
+class WritePacer:
+    """Per-device delay after every BLE write, adapted to how the tag keeps up.
+
+    Additive decrease while parts are acknowledged, multiplicative increase when
+    the tag stalls (asks for a part again or stops answering). The delay never
+    goes below floor, the configured write delay. The caller keeps the pacer (and
+    persists delay) across attempts and connections.
+    """
+
+    def __init__(self, delay: float | None = None, floor: float = 0.0) -> None:
+        self.floor = max(0.0, floor)
+        self.delay = max(self.floor, delay or 0.0)
+
+    def acked(self) -> None:
+        self.delay = max(self.floor, self.delay - _PACE_STEP)
+
+    def stalled(self) -> None:
+        self.delay = min(max(_PACE_MAX, self.floor), max(_PACE_BACKOFF, self.delay * 2))
+        _LOGGER.debug("Tag stalled, write delay now %.3f s", self.delay)
+
+def _part_index(data: bytes) -> int | None:
+    """Part index the tag asks for in an IMAGE answer (05 00 + 4B LE index), None for anything else."""
+    if len(data) < 6 or data[0] != 0x05 or data[1] != 0x00:
+        return None
+    return int.from_bytes(data[2:6], "little")
+
 WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
 
 def disconnect_on_missing_services(func: WrapFuncType) -> WrapFuncType:
@@ -43,12 +92,19 @@ def disconnect_on_missing_services(func: WrapFuncType) -> WrapFuncType:
 async def update_image(
     ble_device: BLEDevice,
     device: DeviceEntry,
-    image: Image,
-    threshold: int,
-    red_threshold: int,
+    payload: bytes,
     attempt: int = 1,
-    write_delay_ms: int = 0
+    write_delay_ms: int = 0,
+    stats: TransferStats | None = None,
+    window: int = 1,
+    pacer: WritePacer | None = None,
+    resume: int = 0,
 ) -> bool:
+    """Connect and send payload to the tag.
+
+    resume: parts the tag acknowledged in an earlier failed transfer of the same
+    payload. The transfer continues from there if the tag asks for it.
+    """
     client: BleakClient | None = None
     try:
         client = await establish_connection(BleakClient, ble_device, ble_device.address)
@@ -61,9 +117,13 @@ async def update_image(
         if len(char_uuids) < 2:
             raise BleakServiceMissing(f"UUID Len: {len(char_uuids)}")
         sorted_uuids = sorted(char_uuids, key=lambda x: int(x[4:8], 16))
-        gicisky = GiciskyClient(client, sorted_uuids, device, attempt, write_delay_ms)
+        gicisky = GiciskyClient(client, sorted_uuids, device, attempt, write_delay_ms, window, pacer, resume)
         await gicisky.start_notify()
-        success = await gicisky.write_image(image, threshold, red_threshold)
+        success = await gicisky.write_image(payload)
+        if stats is not None:
+            stats.parts = gicisky.parts_sent
+            stats.part_rtt = gicisky.part_rtt
+            stats.acked_parts = gicisky.acked_parts
         try:
             await gicisky.stop_notify()
         except Exception as e:
@@ -93,32 +153,65 @@ class GiciskyClient:
         uuids: list[str],
         device: DeviceEntry,
         attempt: int = 1,
-        write_delay_ms: int = 0
+        write_delay_ms: int = 0,
+        window: int = 1,
+        pacer: WritePacer | None = None,
+        resume: int = 0,
     ) -> None:
         self.client = client
+        self.device = device
         self.attempt = attempt
-        self.write_delay_ms = write_delay_ms
+        # write_delay_ms is the lower bound of the adaptive delay
+        self.pacer = pacer if pacer is not None else WritePacer(floor=write_delay_ms / 1000.0)
         self.cmd_uuid, self.img_uuid = uuids[:2]
-        self.width = device.width
-        self.height = device.height
-        self.support_red = device.red
-        self.tft = device.tft
-        self.rotation = device.rotation
-        self.mirror_x = device.mirror_x
-        self.mirror_y = device.mirror_y
-        self.compression = device.compression
         self.compression2 = device.compression2
-        self.invert_luminance = device.invert_luminance
-        self.four_color = device.four_color
         self.packet_size = 0 #(device.width * device.height) // 8 * (2 if device.red else 1)
-        self.event: Event = Event()
-        self.command_data: bytes | None = None
-        self.image_packets: list[int] = []
+        # (arrival time, data) of every notification, in order
+        self._notifications: Queue[tuple[float, bytes]] = Queue()
+        self.last_notified_at: float | None = None
+        self.image_packets: memoryview = memoryview(b"")
+        # 4B part index + part data, reused for every IMAGE_DATA write
+        self._part_buffer = bytearray(4 + PART_SIZE)
+        self.parts_sent = 0
+        # Seconds from IMAGE_DATA writes to the answers matching them
+        self._part_rtt_total = 0.0
+        self._part_rtt_samples = 0
+        # IMAGE_DATA parts in flight (1 = stop-and-wait)
+        self.window = max(1, window)
+        # Highest part the tag may resume from (acknowledged in an earlier transfer of this payload)
+        self.resume_part = resume
+        # Parts the tag acknowledged in this transfer (the index it asked for last)
+        self.acked_parts = 0
+
+    @property
+    def part_rtt(self) -> float | None:
+        """Mean IMAGE_DATA round-trip time (seconds) of this transfer."""
+        if not self._part_rtt_samples:
+            return None
+        return self._part_rtt_total / self._part_rtt_samples
+
+    def _add_rtt(self, sent_at: float) -> None:
+        """Count the round trip from a write at sent_at to the last notification read.
+
+        An answer received before the write (to an earlier copy of the part) is no sample.
+        """
+        if self.last_notified_at < sent_at:
+            return
+        self._part_rtt_total += self.last_notified_at - sent_at
+        self._part_rtt_samples += 1
+
+    def _early(self, sent_at: float) -> bool:
+        """Whether the last notification came too soon after a write at sent_at to answer it.
+
+        Such an answer is a late duplicate of an earlier one. Until a round trip has
+        been measured, every answer counts as genuine.
+        """
+        rtt = self.part_rtt
+        return rtt is not None and self.last_notified_at - sent_at < rtt / 2
 
     @disconnect_on_missing_services
     async def start_notify(self) -> None:
         await self.client.start_notify(self.cmd_uuid, self._notification_handler)
-        await sleep(1.0)
 
     @disconnect_on_missing_services
     async def stop_notify(self) -> None:
@@ -127,8 +220,7 @@ class GiciskyClient:
     @disconnect_on_missing_services
     async def write(self, uuid: str, data: bytes, response = False) -> None:
         chunk = len(data)
-        delay = self.write_delay_ms / 1000.0  # Convert ms to seconds
-        delay += (0.05 * (self.attempt - 1))
+        delay = self.pacer.delay
         _LOGGER.debug("Write UUID=%s data=%s attempt=%s delay=%s", uuid, len(data), self.attempt, delay)
         for i in range(0, len(data), chunk):
             await self.client.write_gatt_char(uuid, data[i : i + chunk], response)
@@ -136,55 +228,68 @@ class GiciskyClient:
                 await sleep(delay)
 
     def _notification_handler(self, _: Any, data: bytearray) -> None:
-        if self.command_data is None:
-            self.command_data = bytes(data)
-            self.event.set()
-
-    async def read(self, timeout: float = 5.0) -> bytes:
-        await wait_for(self.event.wait(), timeout)
-        data = self.command_data or b""
-        _LOGGER.debug("Received: %s", data.hex())
-        return data
+        self._notifications.put_nowait((time.monotonic(), bytes(data)))
 
-    async def write_with_response(self, uuid, packet: bytes) -> bytes:
-        # self.command_data = None
-        # self.event.clear()
-        # await self.write(uuid, packet)
-        # return await self.read()
-        last_exception = None
-        max_retries = 1
-        for attempt in range(1, max_retries + 1):
+    def _drain(self) -> None:
+        """Drop notifications nobody waited for (late or duplicate answers to earlier writes)."""
+        while True:
             try:
-                self.command_data = None
-                self.event.clear()
-                await self.write(uuid, packet)
-                return await self.read()
-            except Exception as e:
-                last_exception = e
-                if attempt < max_retries:
-                    _LOGGER.warning(f"Write retry (attempt {attempt}/{max_retries})")
-                    await sleep(0.5)
-                    continue
-                raise last_exception
-    
+                received_at, data = self._notifications.get_nowait()
+            except QueueEmpty:
+                return
+            _LOGGER.debug("Dropping stale notification %s (%.3f s old)", data.hex(), time.monotonic() - received_at)
+
+    async def read(self, timeout: float = 5.0, expect: tuple[int, ...] | None = None) -> bytes:
+        """Next notification; with expect, skip notifications whose first byte is not in it."""
+        deadline = time.monotonic() + timeout
+        while True:
+            received_at, data = await wait_for(self._notifications.get(), max(0.0, deadline - time.monotonic()))
+            if expect is not None and (not data or data[0] not in expect):
+                _LOGGER.debug("Ignoring unrelated notification %s", data.hex())
+                continue
+            self.last_notified_at = received_at
+            _LOGGER.debug("Received: %s", data.hex())
+            return data
+
+    async def write_with_response(
+        self, uuid, packet: bytes, expect: tuple[int, ...] | None = None, timeout: float = 5.0
+    ) -> bytes:
+        """Write a packet and return the notification answering it.
+
+        Notifications still queued from earlier writes are dropped first, so a late
+        or duplicate answer is never taken for the answer to this packet.
+        """
+        self._drain()
+        await self.write(uuid, packet)
+        return await self.read(timeout, expect)
+
     async def write_start_with_response(self) -> bytes:
-        return await self.write_with_response(self.cmd_uuid, self._make_cmd_packet(0x01))
+        # Readiness check: the first answer to START shows the tag is listening
+        for attempt in range(1, _READY_ATTEMPTS + 1):
+            try:
+                return await self.write_with_response(
+                    self.cmd_uuid, self._make_cmd_packet(0x01), (0x01,), _READY_TIMEOUT
+                )
+            except TimeoutError:
+                if attempt == _READY_ATTEMPTS:
+                    raise
+                _LOGGER.debug("No answer to START yet (attempt %s/%s)", attempt, _READY_ATTEMPTS)
 
     async def write_size_with_response(self) -> bytes:
-        return await self.write_with_response(self.cmd_uuid, self._make_cmd_packet(0x02))
+        return await self.write_with_response(self.cmd_uuid, self._make_cmd_packet(0x02), (0x02,))
 
     async def write_start_image_with_response(self) -> bytes:
-        return await self.write_with_response(self.cmd_uuid, self._make_cmd_packet(0x03))
+        return await self.write_with_response(self.cmd_uuid, self._make_cmd_packet(0x03), (0x05,))
 
     async def write_image_with_response(self, part:int) -> bytes:
         return await self.write_with_response(self.img_uuid, self._make_size_packet(part))
     
-    async def write_image(self, image: Image, threshold: int, red_threshold: int) -> None:
+    async def write_image(self, payload: bytes) -> bool:
         part = 0
         last_part = -1
         same_part_count = 0
         status = self.Status.START
-        self.image_packets = self._make_image_packet(image, threshold, red_threshold)
+        self.image_packets = memoryview(payload)
         self.packet_size = len(self.image_packets)
         try:
             while True:
@@ -202,236 +307,141 @@ class GiciskyClient:
 
                 elif status == self.Status.IMAGE:  
                     data = await self.write_start_image_with_response()
-                    if len(data) < 6 or data[0] != 0x05 or data[1] != 0x00:
+                    requested = _part_index(data)
+                    if requested is None:
                         raise Exception(f"Packet Error: {data}")
+                    if 0 < requested <= self.resume_part and requested * PART_SIZE < self.packet_size:
+                        _LOGGER.debug("Resuming transfer at part %s", requested)
+                        part = requested
+                        self.acked_parts = requested
+                    elif requested:
+                        _LOGGER.debug("Tag asked for part %s, no matching transfer to resume: restarting", requested)
                     status = self.Status.IMAGE_DATA
+                    if self.window > 1:
+                        part = await self._write_image_data_windowed(part)
+                        if part is None:
+                            return True
+                        # Fell back to stop-and-wait: the tag asked for part once already
+                        last_part = part
+                        same_part_count = 1
 
                 elif status == self.Status.IMAGE_DATA:  
+                    sent_at = time.monotonic()
                     data = await self.write_image_with_response(part)
-                    if len(data) < 6 or data[0] != 0x05 or data[1] != 0x00:
+                    self.parts_sent += 1
+                    if _part_index(data) == part and self._early(sent_at):
+                        data = await self._follow_up(data)
+                    self._add_rtt(sent_at)
+                    new_part = _part_index(data)
+                    if new_part is None:
                         break
-                    new_part = int.from_bytes(data[2:6], "little")
                     
                     # Check for consecutive identical part values
                     if new_part == last_part:
+                        self.pacer.stalled()
                         same_part_count += 1
                         if same_part_count >= 3:
-                            raise Exception(f"Part stalled: part={new_part} repeated 3 times")
+                            raise PartStalled(f"Part stalled: part={new_part} repeated 3 times")
+                        # Back off before writing the part again
+                        await sleep(self.pacer.delay)
                     else:
+                        self.pacer.acked()
+                        self.acked_parts = max(self.acked_parts, new_part)
                         same_part_count = 1
                         last_part = new_part
                     part = new_part
                 else:
                     raise Exception(f"Status Error: {status}")
             return True
+        except PartStalled as e:
+            # Every repeat of the part has backed off already
+            _LOGGER.error(f"Write failed: {e}")
+            return False
         except Exception as e:
+            # A failed transfer backs off the next attempt
+            self.pacer.stalled()
             _LOGGER.error(f"Write failed: {e}")
             return False
         finally:
             _LOGGER.debug("Finish")
 
-    def _overlay_images(
-        self,
-        base: Image,
-        overlay: Image,
-        position: tuple[int, int] = (0, 0),
-        center: bool = False
-    ) -> Image:
-        if base.mode != 'RGB':
-            base_rgb = base.convert('RGB')
-        else:
-            base_rgb = base.copy()
-
-        w_base, h_base = base_rgb.size
-
-        ov = overlay.convert('RGB')
-        if ov.width > w_base or ov.height > h_base:
-            ov = ov.crop((0, 0, w_base, h_base))
-
-        if center:
-            x = (w_base - ov.width) // 2
-            y = (h_base - ov.height) // 2
-            position = (x, y)
-
-        base_rgb.paste(ov, position)
-        return base_rgb
-
-    def _make_image_packet(self, image: Image, threshold: int, red_threshold: int) -> list[int]:
-        img = Image.new('RGB', (self.width, self.height), color='white')
-        img = self._overlay_images(img, image)
-        tft = self.tft
-        rotation = self.rotation
-        width, height = img.size
-        if tft:
-            img = img.resize((width // 2, height * 2), resample=Image.BICUBIC)
-
-        if rotation != 0:
-            img = img.rotate(rotation, expand=True)
-
-        width, height = img.size
-        pixels = img.load()
-
-        if self.four_color:
-            return self._make_four_color_packet(pixels, width, height, threshold, red_threshold)
-
-        if self.compression2:
-            return self._compress_byte_data_2(pixels, width, height, threshold, red_threshold)
-
-        byte_data = []
-        byte_data_red = []
-        current_byte = 0
-        current_byte_red = 0
-        bit_pos = 7
-
-        for y in range(height - 1, -1, -1) if self.mirror_y else range(height):
-            for x in range(width - 1, -1, -1) if self.mirror_x else range(width):
-                px = (x, y)
-                r, g, b = pixels[px]
-
-                luminance = ((r * 38) + (g * 75) + (b * 15)) >> 7
-                if self.invert_luminance:
-                    if luminance < threshold:
-                        current_byte |= (1 << bit_pos)
-                else:
-                    if luminance > threshold:
-                        current_byte |= (1 << bit_pos)
-                if (r > red_threshold) and (g < red_threshold):
-                    current_byte_red |= (1 << bit_pos)
-
-                bit_pos -= 1
-                if bit_pos < 0:
-                    byte_data.append(current_byte)
-                    byte_data_red.append(current_byte_red)
-                    current_byte = 0
-                    current_byte_red = 0
-                    bit_pos = 7
-
-        if bit_pos != 7:
-            byte_data.append(current_byte)
-            byte_data_red.append(current_byte_red)
-
-
-
-        if self.compression:
-            return self._compress_byte_data(byte_data, byte_data_red)
-        
-        combined = byte_data + byte_data_red if self.support_red else byte_data
-        return list(bytearray(combined))
-
-    def _make_four_color_packet(self, pixels, width, height, threshold, red_threshold) -> list[int]:
-        byte_data = []
-        current_byte = 0
-        shift_counter = 3
-        
-        for y in range(height - 1, -1, -1) if self.mirror_y else range(height):
-            for x in range(width - 1, -1, -1) if self.mirror_x else range(width):
-                r, g, b = pixels[(x, y)]
-                
-                # Calculate weighted luminance for white detection
-                luminance = ((r * 38) + (g * 75) + (b * 15)) >> 7
-                
-                is_white = luminance > threshold
-                is_red = r > red_threshold
-                is_green = g > red_threshold
-                is_blue = b > red_threshold
-                
-                if is_green and is_red and is_blue:
-                   is_green = False
-                
-                if is_red and is_white:
-                    is_red = False
+    async def _write_image_data_windowed(self, part: int) -> int | None:
+        """IMAGE_DATA phase with up to self.window parts in flight.
 
-                # 00: Black, 01: White, 10: Yellow, 11: Red
-                val = 2 if is_green else (3 if is_red else (1 if is_white else 0))
-
-                current_byte |= (val << (shift_counter * 2))
-                
-                if shift_counter == 0:
-                    byte_data.append(current_byte)
-                    current_byte = 0
-                    shift_counter = 3
-                else:
-                    shift_counter -= 1
-        
-        return list(bytearray(byte_data))
-    
-    def _compress_byte_data(self, byte_data, byte_data_red) -> list[int]:
-        byte_per_line = self.height // 8
-        buf = [0x00, 0x00, 0x00, 0x00]
-        pos = 0
-        for _ in range(self.width):
-            buf.extend([
-                0x75,
-                byte_per_line + 7,
-                byte_per_line,
-                0x00, 0x00, 0x00, 0x00
-            ])
-            buf.extend(byte_data[pos:pos + byte_per_line])
-            pos += byte_per_line
-
-        if byte_data_red is not None:
-            pos = 0
-            for _ in range(self.width):
-                buf.extend([
-                    0x75,
-                    byte_per_line + 7,
-                    byte_per_line,
-                    0x00, 0x00, 0x00, 0x00
-                ])
-                buf.extend(byte_data_red[pos:pos + byte_per_line])
-                pos += byte_per_line
-
-        total_len = len(buf)
-        buf[0] = total_len & 0xFF
-        buf[1] = (total_len >> 8) & 0xFF
-        buf[2] = (total_len >> 16) & 0xFF
-        buf[3] = (total_len >> 24) & 0xFF
-
-        return list(bytearray(buf))
-
-    def _compress_byte_data_2(self, pixels, width, height, threshold, red_threshold) -> list[int]:
-        """1-bit dual plane BWR packing + compress. Used when compression2=True.
-
-        Part1: BW plane (1=white, 0=black), MSB first, row-major
-        Part2: Red plane (1=red, 0=not red), MSB first, row-major
+        The tag answers every part with the index of the part it wants next. A
+        notification that moves the index forward acknowledges every part before
+        it; a repeated (or earlier) index or a missing notification means the tag
+        stalled. Returns None once the tag has the whole image, or the part it
+        asked for on a stall, from which write_image() continues stop-and-wait.
+        """
+        requested = part  # last part index the tag asked for
+        next_part = part  # next part to write
+        pending: bytes | None = None  # notification read ahead by _follow_up()
+        sent_at: dict[int, float] = {}  # last write time of every part
+        while True:
+            while next_part < requested + self.window and next_part * PART_SIZE < self.packet_size:
+                sent_at[next_part] = time.monotonic()
+                await self.write(self.img_uuid, self._make_size_packet(next_part))
+                self.parts_sent += 1
+                next_part += 1
+
+            if pending is not None:
+                data, pending = pending, None
+            else:
+                try:
+                    data = await self.read()
+                except TimeoutError:
+                    self.pacer.stalled()
+                    _LOGGER.debug("No notification for parts %s..%s, falling back to stop-and-wait", requested, next_part - 1)
+                    self.window = 1
+                    return requested
+
+            new_part = _part_index(data)
+            if new_part is None:
+                return None
+            if new_part > requested:
+                if new_part - 1 in sent_at:
+                    self._add_rtt(sent_at[new_part - 1])
+                self.pacer.acked()
+                self.acked_parts = new_part
+                requested = new_part
+                next_part = max(next_part, new_part)
+                continue
+
+            # Parts after it are in flight: the next answer, already on its way,
+            # shows whether the repeat was a duplicate
+            follow = await self._follow_up(data)
+            if follow is not data:
+                pending = follow
+                continue
+            # Repeated index: the tag lost a part (or is stalling)
+            self.pacer.stalled()
+            _LOGGER.debug("Tag asked for part %s again, falling back to stop-and-wait", new_part)
+            self.window = 1
+            # Let the answers to the parts still in flight arrive and discard them
+            await sleep(_DUPLICATE_GRACE)
+            self._drain()
+            return new_part
+
+    async def _follow_up(self, data: bytes) -> bytes:
+        """Resolve a stale or duplicate answer that repeats a part index.
+
+        Returns the next notification if it arrives within _DUPLICATE_GRACE and moves
+        past that index (the real answer), otherwise data itself. A further repeat
+        is consumed as part of the same stall.
         """
-        total_pixels = width * height
-        plane_bytes = total_pixels // 8
-        bw_plane = bytearray(plane_bytes)
-        red_plane = bytearray(plane_bytes)
-        byte_idx = 0
-        bit_pos = 7  # MSB first
-        y_range = range(height - 1, -1, -1) if self.mirror_y else range(height)
-        x_range = range(width - 1, -1, -1) if self.mirror_x else range(width)
-        for y in y_range:
-            for x in x_range:
-                r, g, b = pixels[x, y]
-                luminance = (r * 38 + g * 75 + b * 15) >> 7
-                is_white = luminance > threshold
-                is_red = (r > red_threshold) and (g < red_threshold)
-                if is_white:
-                    bw_plane[byte_idx] |= (1 << bit_pos)
-                if is_red:
-                    red_plane[byte_idx] |= (1 << bit_pos)
-                bit_pos -= 1
-                if bit_pos < 0:
-                    byte_idx += 1
-                    bit_pos = 7
-        raw = bytes(bw_plane) + bytes(red_plane)
+        repeated = _part_index(data)
+        received_at = self.last_notified_at
         try:
-            compressed = compress_data(raw, force_raw=True)  # TODO: QuickLZ 호환 확인 후 force_raw 제거
-            # compress_data 반환: [4B part2_len] + compressed_part1 + compressed_part2
-            # prefix 없이 그대로 반환 (7.5"의 total_len 헤더와 동일한 위치)
-            _LOGGER.debug(
-                "Compress (1-bit dual plane BWR): raw=%s -> %s bytes, head32=%s",
-                len(raw),
-                len(compressed),
-                compressed[:32].hex() if len(compressed) >= 32 else compressed.hex(),
-            )
-            return list(compressed)
-        except Exception as e:
-            _LOGGER.warning("Compression failed: %s. Using uncompressed data.", e)
-            return list(raw)
+            follow = await self.read(_DUPLICATE_GRACE)
+        except TimeoutError:
+            return data
+        index = _part_index(follow)
+        if index is None or index > repeated:
+            _LOGGER.debug("Ignoring duplicate answer for part %s", repeated)
+            return follow
+        self.last_notified_at = received_at
+        return data
 
     def _make_cmd_packet(self, cmd: int) -> bytes:
         if cmd == 0x02:
@@ -451,41 +461,10 @@ class GiciskyClient:
                 return bytes(packet)
         return bytes([cmd])
 
-    def _make_size_packet(self, part: int) -> bytes:
-        start = part * 240
-        chunk = self.image_packets[start : start + min(240, self.packet_size - start)]
-        packet = bytearray(4 + len(chunk))
+    def _make_size_packet(self, part: int) -> memoryview:
+        start = part * PART_SIZE
+        size = max(0, min(PART_SIZE, self.packet_size - start))
+        packet = self._part_buffer
         struct.pack_into("<I", packet, 0, part)
-        packet[4:] = bytes(chunk)
-        return bytes(packet)
-
-
-def decompress_byte_data(payload: bytes, width: int, height: int) -> tuple[list[int], list[int] | None]:
-    """
-    _compress_byte_data() 출력 형식의 역연산.
-    compression=True 디바이스(예: 7.5" 0x2B) 패킷을 복원해 (byte_data, byte_data_red) 반환.
-    byte_data_red는 없으면 None.
-    """
-    if len(payload) < 4:
-        return ([], None)
-    byte_per_line = height // 8
-    chunk_header = 7  # 0x75, total_byte, uncompressed_byte, 0x00*4
-    chunk_size = chunk_header + byte_per_line
-    pos = 4
-    byte_data: list[int] = []
-    for _ in range(width):
-        if pos + chunk_size > len(payload) or payload[pos] != 0x75:
-            break
-        pos += chunk_header
-        byte_data.extend(payload[pos : pos + byte_per_line])
-        pos += byte_per_line
-    byte_data_red: list[int] | None = None
-    if pos < len(payload) and payload[pos] == 0x75:
-        byte_data_red = []
-        for _ in range(width):
-            if pos + chunk_size > len(payload) or payload[pos] != 0x75:
-                break
-            pos += chunk_header
-            byte_data_red.extend(payload[pos : pos + byte_per_line])
-            pos += byte_per_line
-    return (byte_data, byte_data_red)
+        packet[4 : 4 + size] = self.image_packets[start : start + size]
+        return memoryview(packet)[: 4 + size]
@@ -83,10 +83,28 @@ def get_font_file(font_name, hass):
             _LOGGER.debug(f"Font => font_name: {font_name} got font_file: {font_file}")
     return font_file
 
+def canvas_rotation(service):
+    # clockwise rotation of the drawn canvas (right angles only, anything else is ignored)
+    rotate = int(service.data.get("rotate", 0))
+    return rotate if rotate in (90, 180, 270) else 0
+
+def rotate_canvas(img, rotate):
+    if rotate:
+        img = img.rotate(-rotate, expand=True)
+    return img
+
+# PNG of the canvas in panel orientation (image entity), rotated and encoded in one executor job
+def canvas_png(img, rotate):
+    png = BytesIO()
+    rotate_canvas(img, rotate).save(png, "PNG")
+    return png.getvalue()
+
 # custom image generator
-def customimage(entity_id, device, service, hass):
+# apply_rotate=False returns the canvas as drawn; the caller applies canvas_rotation() itself
+# (Gicisky frames fold it into the device geometry plan)
+def customimage(entity_id, device, service, hass, apply_rotate=True):
     payload = service.data.get("payload", "")
-    rotate = int(service.data.get("rotate", 0))
+    rotate = canvas_rotation(service)
     background = getIndexColor(service.data.get("background","white"))
     canvas_width = device.width
     canvas_height = device.height
@@ -605,8 +623,8 @@ def customimage(entity_id, device, service, hass):
                 img_draw.text((text_x, text_y), percentage_text, font=font, fill=text_color, anchor='lt') # TODO anchor is still off
 
     #post processing
-    if rotate == 90 or rotate == 180 or rotate == 270:
-        img = img.rotate(-rotate, expand=True)
+    if apply_rotate:
+        img = rotate_canvas(img, rotate)
     rgb_image = img.convert('RGB')
     patha = os.path.join(os.path.dirname(__file__), entity_id + '.jpg')
     # pathb = get_image_path(hass, entity_id)
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 from datetime import datetime
-from typing import cast
+from typing import Any, cast
 import logging
 from .gicisky_ble import SensorDeviceClass as GiciskySensorDeviceClass, SensorUpdate, Units
 from .gicisky_ble.const import (
@@ -33,6 +33,7 @@ from homeassistant.const import (
     UnitOfElectricCurrent,
     UnitOfElectricPotential,
     UnitOfEnergy,
+    UnitOfInformation,
     UnitOfLength,
     UnitOfMass,
     UnitOfPower,
@@ -460,6 +461,10 @@ async def async_setup_entry(
     duration_coordinator = hass.data[DOMAIN][entry.entry_id]["duration_coordinator"]
     async_add_entities([GiciskyDurationSensorEntity(hass, entry, duration_coordinator)])
 
+    # Add payload statistics sensor
+    stats_coordinator = hass.data[DOMAIN][entry.entry_id]["stats_coordinator"]
+    async_add_entities([GiciskyPayloadSensorEntity(hass, entry, stats_coordinator)])
+
 
 class GiciskyBluetoothSensorEntity(
     PassiveBluetoothProcessorEntity[GiciskyPassiveBluetoothDataProcessor[float | None]],
@@ -548,3 +553,76 @@ class GiciskyDurationSensorEntity(
         self._native_value = self.data
         super()._handle_coordinator_update()
 
+
+
+class GiciskyPayloadSensorEntity(
+    CoordinatorEntity[DataUpdateCoordinator[dict[str, Any] | None]],
+    SensorEntity,
+):
+    """Encoded size of the last frame, with compression statistics as attributes."""
+
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_native_unit_of_measurement = UnitOfInformation.BYTES
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        coordinator: DataUpdateCoordinator[dict[str, Any] | None],
+    ) -> None:
+        """Initialize the payload sensor."""
+        CoordinatorEntity.__init__(self, coordinator)
+        address = hass.data[DOMAIN][entry.entry_id]["address"]
+        device_type = hass.data[DOMAIN][entry.entry_id].get("device_type", DEVICE_TYPE_GICISKY)
+        self._address = address
+        self._device_type = device_type
+        self._identifier = address.replace(":", "")[-8:]
+
+        # Use appropriate device names based on device type
+        if device_type == DEVICE_TYPE_BADGE_EINK:
+            device_name = "Badge e-ink"
+            self._manufacturer = "Badge e-ink"
+        else:
+            device_name = "Gicisky"
+            self._manufacturer = "Gicisky"
+
+        self._attr_name = f"{device_name} {self._identifier} Payload Size"
+        self._attr_unique_id = f"{device_type}_{self._identifier}_payload_size"
+        self._stats: dict[str, Any] | None = None
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the encoded size of the last frame."""
+        if self._stats is None:
+            return None
+        return self._stats["encoded_size"]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return raw size, chunk counts, parts and encode time of the last frame."""
+        if self._stats is None:
+            return None
+        return {key: value for key, value in self._stats.items() if key != "encoded_size"}
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return device info."""
+        return DeviceInfo(
+            connections={(CONNECTION_BLUETOOTH, self._address)},
+            name=f"{self._manufacturer} {self._identifier}",
+            manufacturer=self._manufacturer,
+        )
+
+    @cached_property
+    def available(self) -> bool:
+        """Entity always available."""
+        return True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        _LOGGER.debug("Updated payload stats: %s", self.coordinator.data)
+        self._stats = self.coordinator.data
+        super()._handle_coordinator_update()
@@ -0,0 +1,36 @@
+"""Persistent per-device state for the Gicisky integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import STORAGE_KEY, STORAGE_VERSION
+
+SAVE_DELAY = 10
+
+
+class GiciskyStore:
+    """Per-address state kept in Home Assistant storage."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._data: dict[str, Any] = {}
+
+    async def async_load(self) -> None:
+        self._data = await self._store.async_load() or {}
+
+    def _devices(self) -> dict[str, dict[str, Any]]:
+        return self._data.setdefault("devices", {})
+
+    def get(self, address: str, key: str, default: Any = None) -> Any:
+        return self._devices().get(address, {}).get(key, default)
+
+    def set(self, address: str, key: str, value: Any) -> None:
+        device = self._devices().setdefault(address, {})
+        if device.get(key) == value:
+            return
+        device[key] = value
+        self._store.async_delay_save(lambda: self._data, SAVE_DELAY)